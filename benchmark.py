@@ -0,0 +1,123 @@
+#! /usr/bin/env python3
+
+# Measure the run time of psp_libdoc operations on the largest modules, growing the input size to show how they scale.
+# A reference version of the benchmarked script (e.g. extracted from an older commit) can be given to compare both implementations:
+# psp_libdoc.py for "update", make_statistics.py for "stats".
+# Usage example: git show HEAD~1:psp_libdoc.py > /tmp/ref_libdoc.py; ./benchmark.py update --reference /tmp/ref_libdoc.py
+
+import argparse
+import contextlib
+import importlib.util
+import inspect
+import io
+import make_statistics
+import os
+import psp_firmware
+import psp_libdoc
+import shutil
+import sys
+import tempfile
+import time
+
+MODULES = ["PSPLibDoc/kd/sysmem.xml", "PSPLibDoc/kd/threadman.xml"]
+SCALES = [1, 4, 16, 32]
+
+# Load a script from an arbitrary path, so that it can be compared with the current one
+def load_reference(path):
+    spec = importlib.util.spec_from_file_location("benchmark_reference", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Build "scale" times the entries of a module, the additional copies having new NIDs in the same libraries
+def scaled_entries(entries, scale):
+    output = list(entries)
+    for i in range(1, scale):
+        for e in entries:
+            nid = "%08X" % ((int(e.nid, 16) + i * 0x9E3779B1) & 0xFFFFFFFF)
+            output.append(e._replace(nid=nid, name=e.libraryName + '_' + nid))
+    return output
+
+def time_update(libdoc, entries, xml_file):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_file = os.path.join(tmpdir, os.path.basename(xml_file))
+        shutil.copy(xml_file, tmp_file)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            libdoc.updatePSPLibdoc(entries, tmp_file, "9.99")
+        return time.perf_counter() - start
+
+# Update a copy of each module with growing sets of entries (known names and new NIDs) for a new firmware version
+def bench_update(implementations):
+    # Warm up the imports and the file cache before measuring anything
+    time_update(psp_libdoc, [], MODULES[0])
+    for xml_file in MODULES:
+        entries = psp_libdoc.loadPSPLibdoc(xml_file)
+        for scale in SCALES:
+            cur_entries = scaled_entries(entries, scale)
+            times = [time_update(libdoc, cur_entries, xml_file) for (_, libdoc) in implementations]
+            report(os.path.basename(xml_file), len(cur_entries), implementations, times)
+
+# Build the NID lists of the libraries of a module as make_statistics does, scaled "scale" times with new NIDs
+# whose names do not match their hash (so that they also go through the checks for randomized NIDs)
+def scaled_libraries(xml_file, scale):
+    nid_bylib = {}
+    for e in scaled_entries(psp_libdoc.loadPSPLibdoc(xml_file), 1):
+        cur_ver = [v for v in e.versions if not v.startswith('vita')]
+        if len(cur_ver) > 0:
+            nid_bylib.setdefault(e.libraryName, []).append({"nid": e.nid, "name": e.name, "versions": cur_ver, "source": e.source})
+    for lib in nid_bylib:
+        nids = nid_bylib[lib]
+        for i in range(1, scale):
+            for nid in list(nids[:len(nids) // i]):
+                new_nid = "%08X" % ((int(nid["nid"], 16) + i * 0x9E3779B1) & 0xFFFFFFFF)
+                nids.append(dict(nid, nid=new_nid, name=nid["name"] + "_%d" % i))
+    return nid_bylib
+
+def time_stats(stats, module, nid_bylib):
+    # Older versions of handle_library also took the list of all versions
+    versions = psp_firmware.sortVersions(set(v for nids in nid_bylib.values() for nid in nids for v in nid["versions"]))
+    kwargs = {"versions": versions} if 'versions' in inspect.signature(stats.handle_library).parameters else {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stats.OUTPUT_HTML = tmpdir
+        os.makedirs(tmpdir + "/modules")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            for lib in sorted(nid_bylib):
+                stats.handle_library(module, lib, nid_bylib[lib], **kwargs)
+        return time.perf_counter() - start
+
+# Compute the statistics of all the libraries of each module, with a growing number of NIDs
+def bench_stats(implementations):
+    for xml_file in MODULES:
+        module = os.path.basename(xml_file).split('.')[0] + '.prx'
+        for scale in SCALES:
+            nid_bylib = scaled_libraries(xml_file, scale)
+            times = [time_stats(stats, module, nid_bylib) for (_, stats) in implementations]
+            report(os.path.basename(xml_file), sum(len(nids) for nids in nid_bylib.values()), implementations, times)
+
+def report(name, size, implementations, times):
+    output = "%-16s %8d entries" % (name, size)
+    for ((impl_name, _), t) in zip(implementations, times):
+        output += "  %s: %8.3fs" % (impl_name, t)
+    if len(times) == 2:
+        output += "  speedup: %.1fx" % (times[1] / times[0])
+    print(output)
+
+# Benchmark function and benchmarked module of each benchmark
+BENCHMARKS = {
+    "update": (bench_update, psp_libdoc),
+    "stats": (bench_stats, make_statistics),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='Benchmark to run')
+    parser.add_argument('-r', '--reference', required=False, type=str, help='Reference version of the benchmarked script to compare with')
+    args = parser.parse_args(sys.argv[1:])
+
+    (bench, module) = BENCHMARKS[args.benchmark]
+    implementations = [("current", module)]
+    if args.reference:
+        implementations.append(("reference", load_reference(args.reference)))
+    bench(implementations)
@@ -11,6 +11,8 @@ all_nids = defaultdict(set)
 # List of (NID, name, module, library) tuples with non-matching or unknown NID
 all_unk_nids = []
 
+psp_libdoc.enableCache()
+
 # Browse all the export files
 filelist = glob.glob('PSPLibDoc/**/*.xml', recursive=True)
 for (idx, file) in enumerate(filelist):
@@ -18,9 +20,10 @@ for (idx, file) in enumerate(filelist):
     # Get the version and module name from the path
     version = file.split('/')[1]
     moduleName = file.split('/')[-1].split('.')[0] + '.prx'
-    for e in entries:
+    name_nids = psp_libdoc.compute_nids([e.name for e in entries])
+    for (e, name_nid) in zip(entries, name_nids):
         # Check if the specified names match their NID
-        if psp_libdoc.compute_nid(e.name) == e.nid:
+        if name_nid == e.nid:
             all_nids[e.nid].add((e.name, moduleName, e.libraryName))
         else:
             all_unk_nids.append((e.nid, e.name, moduleName, e.libraryName))
@@ -2,13 +2,22 @@
 
 # Generate a HTML report from all the PSP export files, specifying known names for all libraries, and determining which NIDs have been randomized
 
+import argparse
+import concurrent.futures
+import csv
+import functools
+import psp_firmware
 import psp_libdoc
 import glob
+import hashlib
+import json
 import os
 import sys
 from collections import defaultdict, Counter
 
 OUTPUT_HTML = "./github-pages"
+# Statistics of each library and hashes of the XML files they come from, for incremental runs
+CACHE_FILE = "./.make_statistics_cache.json"
 
 # List of colors & descriptions for each "category" of NID
 HTML_STATUS = [
@@ -29,9 +38,9 @@ def find_html_status(status):
         if s == status:
             return (color, desc)
 
-# Header for the main HTML page
+# Header for the main HTML page (all the HTML outputs are generators of chunks, written as they are produced)
 def html_header(versions):
-    header = """<!DOCTYPE html>
+    yield """<!DOCTYPE html>
 <html>
 <title>PSP NID Status</title>
 <meta name="viewport" content="width=device-width, initial-scale=1">
@@ -54,20 +63,16 @@ On later firmwares, some kernel NIDs were randomized. A star indicates (most of)
 Progress counts are given for both non-randomized and randomized NIDs (if present). Note that for randomized NIDs, all specified names are considered correct even though they cannot be verified. <br />
 Hover a color to get the numbers and the definition of its status. <br />
 </p>"""
-    header += """<table class="w3-table"><tr><th>Module name</th><th>Library name</th><th>Progress</th>"""
-    for ver in versions:
-        header += f"<th>{ver}</th>"
-    header += "</tr>"
-    return header
+    yield """<table class="w3-table"><tr><th>Module name</th><th>Library name</th><th>Progress</th>"""
+    yield "".join(f"<th>{ver}</th>" for ver in versions)
+    yield "</tr>"
 
 # Footer for the main HTML page
 def html_footer():
-    return """</table></div></body></html>"""
+    yield """</table></div></body></html>"""
 
-# Output a row of the large table of the main page, for a given module & library, with the statistics given by "make_stats"
-def html_library(module, lib, stats_byver, versions):
-    # Specify the module and library name
-    output = f"""<tr><td>{module}</td><td><a href="modules/{module}_{lib}.html">{lib}</a></td>"""
+# Reduce the statistics given by "make_stats" for all the versions of a library to what its row on the main page needs, so that they can be cached
+def summarize_library(stats_byver):
     # Make statistics over all versions to give an overall % of resolution for the library
     status_bynid = {}
     for ver in stats_byver:
@@ -76,7 +81,18 @@ def html_library(module, lib, stats_byver, versions):
                 continue
             for cur_nid in stats_byver[ver][0][status]:
                 status_bynid[cur_nid["nid"]] = status
-    cnt = Counter(status_bynid.values())
+    byver = {}
+    for ver in stats_byver:
+        counts = {status: len(stats_byver[ver][0][status]) for status in stats_byver[ver][0] if status != "total"}
+        byver[ver] = {"counts": counts, "total": stats_byver[ver][0]["total"], "obf": stats_byver[ver][1]}
+    return {"agg": dict(Counter(status_bynid.values())), "byver": byver}
+
+# Output a row of the large table of the main page, for a given module & library, with the statistics given by "summarize_library"
+def html_library(module, lib, summary, versions, json_pages=False):
+    # Specify the module and library name
+    yield f"""<tr><td>{module}</td><td><a href="{library_link(module, lib, json_pages)}">{lib}</a></td>"""
+    stats_byver = summary["byver"]
+    cnt = Counter(summary["agg"])
     both_stats = []
     nonobf_ok = cnt["known"]
     nonobf_total = nonobf_ok + cnt["wrong"] + cnt["unknown_nonobf"] + cnt["unknown"]
@@ -87,18 +103,18 @@ def html_library(module, lib, stats_byver, versions):
     if obf_total != 0:
         both_stats.append("%.1f%% (%d/%d)" % (obf_ok / obf_total * 100, obf_ok, obf_total))
     agg_stats = " / ".join(both_stats)
-    output += f"""<td style="white-space: nowrap;">{agg_stats}</td>"""
+    yield f"""<td style="white-space: nowrap;">{agg_stats}</td>"""
 
     # Make a column for each firmware version
     for ver in versions:
         # Show an empty cell if the library didn't exist in that firmware version
         if ver not in stats_byver:
-            output += "<td></td>"
+            yield "<td></td>"
             continue
-        output += "<td>"
-        cur_stats = stats_byver[ver][0]
+        yield "<td>"
+        cur_stats = stats_byver[ver]["counts"]
         # Add a star if the NIDs of that library were (re-)randomized in that firmware version
-        is_obf = stats_byver[ver][1]
+        is_obf = stats_byver[ver]["obf"]
         if is_obf:
             print("OBF", module, versions[versions.index(ver) - 1], ver)
             obf_str = '<div style="position: absolute; width: 100%; height: 100%; text-align: center;">*</div>'
@@ -109,21 +125,46 @@ def html_library(module, lib, stats_byver, versions):
         for (status, color, desc) in HTML_STATUS:
             if status not in cur_stats:
                 continue
-            count = len(cur_stats[status])
+            count = cur_stats[status]
             if count == 0:
                 continue
-            total = cur_stats['total']
+            total = stats_byver[ver]["total"]
             percent = int(count / total * 100)
 
-            output += f"""<div style="position: relative;"><div class="w3-col w3-container w3-{color} w3-tooltip" style="width:{percent}%">
+            yield f"""<div style="position: relative;"><div class="w3-col w3-container w3-{color} w3-tooltip" style="width:{percent}%">
 <span style="position:absolute;left:0;bottom:18px" class="w3-text w3-tag">{count}/{total} NIDs are {desc}</span>
 </div>"""
-        output += f"{obf_str}</div></td>"
-    return output
+        yield f"{obf_str}</div></td>"
+
+# Sort the NIDs of a library by the first firmware version they appear in, then by the names associated to them
+def sort_library_nids(stats_bynid, versions):
+    sorted_nids = []
+    seen_nids = set()
+    for v in versions:
+        ver_nids = []
+        for nid in stats_bynid:
+            if v in stats_bynid[nid]:
+                (_, name, _) = stats_bynid[nid][v]
+                ver_nids.append((name, nid))
+        for (_, nid) in sorted(ver_nids):
+            if nid not in seen_nids:
+                seen_nids.add(nid)
+                sorted_nids.append(nid)
+    return sorted_nids
+
+# Path of the page of a single library, relative to the main page
+def library_link(module, lib, json_pages=False):
+    if json_pages:
+        return f"modules/{LIBRARY_VIEWER}#{module}_{lib}"
+    return f"modules/{module}_{lib}.html"
+
+# Output file of the page (or of the data rendered by the viewer page) of a single library
+def library_file(module, lib, json_pages=False):
+    return OUTPUT_HTML + '/modules/' + module + '_' + lib + ('.json' if json_pages else '.html')
 
 # Output a HTML page for a single library
 def html_single_library(module, lib, stats_bynid, versions):
-    output = f"""<!DOCTYPE html>
+    yield f"""<!DOCTYPE html>
 <html>
 <title>PSP NID Status for {lib} in {module}</title>
 <meta name="viewport" content="width=device-width, initial-scale=1">
@@ -138,30 +179,16 @@ Hover a cell to know the meaning of the color. <br />
 </p>
 """
     # Output the header row (containing all the firmware versions)
-    output += """<table class="w3-table"><tr><th>NID</th>"""
-    for v in versions:
-        output += f"<th>{v}</th>"
-    output += '</tr>'
-    # Sort NIDs by the first firmware version they appear in, then by the names associated to them
-    sorted_nids = []
-    sources = {}
-    for v in versions:
-        ver_nids = []
-        for nid in stats_bynid:
-            if v in stats_bynid[nid]:
-                (_, name, source) = stats_bynid[nid][v]
-                sources[name] = source
-                ver_nids.append((name, nid))
-        for (_, nid) in sorted(ver_nids):
-            if nid not in sorted_nids:
-                sorted_nids.append(nid)
+    yield """<table class="w3-table"><tr><th>NID</th>"""
+    yield "".join(f"<th>{v}</th>" for v in versions)
+    yield '</tr>'
     # For each NID, show the associated name, status & a tooltip explaining its status
-    for nid in sorted_nids:
-        output += f"<tr><td>{nid}</td>"
+    for nid in sort_library_nids(stats_bynid, versions):
+        row = [f"<tr><td>{nid}</td>"]
         last_name = None
         for v in versions:
             if v not in stats_bynid[nid]:
-                output += "<td></td>"
+                row.append("<td></td>")
             else:
                 (status, name, source) = stats_bynid[nid][v]
                 show_name = name
@@ -172,15 +199,89 @@ Hover a cell to know the meaning of the color. <br />
                     source_str = ' (source: ' + source + ')'
                 last_name = name
                 (color, desc) = find_html_status(status)
-                output += f"""<td class="w3-{color}"><div class="w3-tooltip">{show_name}{source_str}<span style="position:absolute;left:0;bottom:18px" class="w3-text w3-tag">NID is {desc}</span></div></td>"""
-        output += "</tr>"
-    output += "</table></div></body></html>"
-    return output
+                row.append(f"""<td class="w3-{color}"><div class="w3-tooltip">{show_name}{source_str}<span style="position:absolute;left:0;bottom:18px" class="w3-text w3-tag">NID is {desc}</span></div></td>""")
+        row.append("</tr>")
+        yield "".join(row)
+    yield "</table></div></body></html>"
+
+# Output the table of a single library as compact JSON, rendered client-side by the LIBRARY_VIEWER page:
+# each row is a NID followed by one cell per version, either 0 (absent) or [status index in HTML_STATUS, name, source]
+def json_single_library(module, lib, stats_bynid, versions):
+    status_idx = {status: idx for (idx, (status, _, _)) in enumerate(HTML_STATUS)}
+    rows = []
+    for nid in sort_library_nids(stats_bynid, versions):
+        cells = []
+        for v in versions:
+            if v not in stats_bynid[nid]:
+                cells.append(0)
+            else:
+                (status, name, source) = stats_bynid[nid][v]
+                cells.append([status_idx[status], name, source])
+        rows.append([nid, cells])
+    return {"module": module, "lib": lib, "versions": versions, "statuses": HTML_STATUS, "rows": rows}
+
+# Page rendering the JSON table of the library given after the "#" of its URL
+LIBRARY_VIEWER = "library.html"
+LIBRARY_VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<title>PSP NID Status</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<link rel="stylesheet" href="https://www.w3schools.com/w3css/4/w3.css">
+<body>
+<div class="w3-container" style="height:100vh; width:100vw; overflow: scroll;">
+<h1 id="title"></h1>
+<p>
+This page contains the status of all the NIDs from the <span class="lib"></span> library inside the <span class="module"></span> module.<br />
+Hover a cell to know the meaning of the color. <br />
+"..." means the given name is the same as the one on its left. <br />
+</p>
+<table class="w3-table" id="nids"></table>
+</div>
+<script>
+function escape(text) {
+    return String(text).replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;");
+}
+fetch(decodeURIComponent(location.hash.substring(1)) + ".json").then(r => r.json()).then(function(data) {
+    document.title = "PSP NID Status for " + data.lib + " in " + data.module;
+    document.getElementById("title").textContent = data.module + ": " + data.lib;
+    document.querySelectorAll(".lib").forEach(e => e.textContent = data.lib);
+    document.querySelectorAll(".module").forEach(e => e.textContent = data.module);
+    var output = ["<tr><th>NID</th>"];
+    data.versions.forEach(v => output.push("<th>" + escape(v) + "</th>"));
+    output.push("</tr>");
+    data.rows.forEach(function(row) {
+        output.push("<tr><td>" + row[0] + "</td>");
+        var last_name = null;
+        row[1].forEach(function(cell) {
+            if (cell === 0) {
+                output.push("<td></td>");
+                return;
+            }
+            var [status, name, source] = cell;
+            var show_name = name;
+            var source_str = "";
+            if (name === last_name) {
+                show_name = "...";
+            } else if (source !== "" && source !== "matching") {
+                source_str = " (source: " + source + ")";
+            }
+            last_name = name;
+            var [_, color, desc] = data.statuses[status];
+            output.push('<td class="w3-' + color + '"><div class="w3-tooltip">' + escape(show_name + source_str) +
+                '<span style="position:absolute;left:0;bottom:18px" class="w3-text w3-tag">NID is ' + desc + '</span></div></td>');
+        });
+        output.push("</tr>");
+    });
+    document.getElementById("nids").innerHTML = output.join("");
+});
+</script>
+</body></html>"""
 
 # Build the statistics for a given library at a given version. "obfuscated" is specified if the NIDs of the library have been randomized in the current or a previous firmware version.
 # "prev_nonobf" lists the NIDs already seen in a version of the library were the NIDs were not (yet) randomized.
 # "prev_ok" lists all the NIDs for which a name was found (which corresponds to the NID when computing the hash).
-def make_stats(module, lib, version, obfuscated, cur_nids, prev_nonobf, prev_ok):
+# "prev_ok_names" counts the names of "prev_ok", to check if a name was previously confirmed without scanning "prev_ok".
+def make_stats(module, lib, version, obfuscated, cur_nids, prev_nonobf, prev_ok, prev_ok_names):
     unk_nids = []
     nok_nids = []
     ok_nids = []
@@ -208,12 +309,7 @@ def make_stats(module, lib, version, obfuscated, cur_nids, prev_nonobf, prev_ok)
             name = cur_nid["name"]
             if nid in prev_ok or nid in prev_nonobf:
                 print("WARN: previously seen non-obfuscated:", module, lib, version, nid, name, prev_nonobf[nid], file=sys.stderr)
-            found_prev = False
-            for nid2 in prev_ok:
-                if prev_ok[nid2][1] == name:
-                    found_prev = True
-                    break
-            if not found_prev:
+            if prev_ok_names[name] == 0:
                 nok_dubious.append(cur_nid)
             else:
                 nok_from_prev.append(cur_nid)
@@ -242,29 +338,53 @@ def make_stats(module, lib, version, obfuscated, cur_nids, prev_nonobf, prev_ok)
     stats['total'] = len(cur_nids)
 
     for cur_nid in ok_nids:
+        if cur_nid["nid"] in prev_ok:
+            prev_ok_names[prev_ok[cur_nid["nid"]][1]] -= 1
         prev_ok[cur_nid["nid"]] = (version, cur_nid["name"])
+        prev_ok_names[cur_nid["name"]] += 1
 
     return stats
 
-def get_nids_ver(nids, ver):
-    output = []
+# Index the NIDs of a library by firmware version, keeping their order
+def get_nids_byver(nids):
+    output = defaultdict(list)
     for nid in nids:
-        if ver in nid["versions"]:
-            output.append(nid)
+        for ver in dict.fromkeys(nid["versions"]):
+            output[ver].append(nid)
+    return output
+
+# Reduce the per-version statuses of each NID of a library to runs of consecutive versions with the same status, name and source
+def nid_status_runs(stats_bynid, versions):
+    output = []
+    for nid in sort_library_nids(stats_bynid, versions):
+        runs = []
+        last = None
+        for v in versions:
+            cur = stats_bynid[nid].get(v)
+            if cur is not None and cur == last:
+                runs[-1]["last"] = v
+            elif cur is not None:
+                (status, name, source) = cur
+                runs.append({"first": v, "last": v, "status": status, "name": name, "source": source})
+            last = cur
+        output.append({"nid": nid, "runs": runs})
     return output
 
-# Make statistics for all the versions of a library, write the single HTML page, and return the row for the main page
-def handle_library(module, lib, nids, versions):
-    vers = list(sorted(set([v for nid in nids for v in nid["versions"]])))
+# Make statistics for all the versions of a library, write the single HTML page, and return the summary for its row on the main page
+# (including the status runs of each NID if "nid_status" is set, for the JSON/CSV exports)
+def handle_library(module, lib, nids, json_pages=False, nid_status=False):
+    vers = psp_firmware.sortVersions(set([v for nid in nids for v in nid["versions"]]))
     # Indicates the NIDs had at least one round of randomization in previous (or current) firmware version
     now_obfuscated = False
     prev_nonobf = {}
     prev_ok = {}
-    stats_byver = {vers[0]: (make_stats(module, lib, vers[0], now_obfuscated, get_nids_ver(nids, vers[0]), prev_nonobf, prev_ok), False)}
+    prev_ok_names = Counter()
+    nids_byver = get_nids_byver(nids)
+    stats_byver = {vers[0]: (make_stats(module, lib, vers[0], now_obfuscated, nids_byver[vers[0]], prev_nonobf, prev_ok, prev_ok_names), False)}
     for (v1, v2) in zip(vers, vers[1:]):
         # For each consecutive firmware versions v1 and v2, see their respective NIDs
-        v1_nids = set([x["nid"] for x in get_nids_ver(nids, v1)])
-        v2_nids = set([x["nid"] for x in get_nids_ver(nids, v2)])
+        v1_nids = set([x["nid"] for x in nids_byver[v1]])
+        v2_nids = set([x["nid"] for x in nids_byver[v2]])
         # Check the NIDs which appeared and the ones which disappeared
         new_nids = v2_nids - v1_nids
         disappear_nids = v1_nids - v2_nids
@@ -276,16 +396,14 @@ def handle_library(module, lib, nids, versions):
         if new_ratio > 0.2 and dis_ratio > 0.2:
             is_obfuscated = True
             # If we find a new NID whose name is known, then it means there cannot have been a randomization here (note this check triggers rarely), except for 5.55 which misses functions from 5.51
+            v2_names = {nid["nid"]: nid["name"] for nid in nids_byver[v2]}
             for n in new_nids:
-                name = None
-                for nid in get_nids_ver(nids, v2):
-                    if nid["nid"] == n:
-                        name = nid["name"]
+                name = v2_names[n]
                 if psp_libdoc.compute_nid(name) == n and v1 != '5.55': # some exceptions exist for 5.55 (which misses functions from 5.51)
                     is_obfuscated = False
         if is_obfuscated:
             now_obfuscated = True
-        stats_byver[v2] = (make_stats(module, lib, v2, now_obfuscated, get_nids_ver(nids, v2), prev_nonobf, prev_ok), is_obfuscated)
+        stats_byver[v2] = (make_stats(module, lib, v2, now_obfuscated, nids_byver[v2], prev_nonobf, prev_ok, prev_ok_names), is_obfuscated)
 
     # Get the results by NID for the individual pages
     stats_bynid = defaultdict(dict)
@@ -295,43 +413,173 @@ def handle_library(module, lib, nids, versions):
                 continue
             for cur_nid in stats_byver[v][0][status]:
                 stats_bynid[cur_nid["nid"]][v] = (status, cur_nid["name"], cur_nid["source"])
-    with open(OUTPUT_HTML + '/modules/' + module + '_' + lib + '.html', 'w') as fd:
-        fd.write(html_single_library(module, lib, stats_bynid, vers))
+    with open(library_file(module, lib, json_pages), 'w') as fd:
+        if json_pages:
+            json.dump(json_single_library(module, lib, stats_bynid, vers), fd, separators=(',', ':'))
+        else:
+            fd.writelines(html_single_library(module, lib, stats_bynid, vers))
+
+    summary = summarize_library(stats_byver)
+    if nid_status:
+        summary["nids"] = nid_status_runs(stats_bynid, vers)
+    return summary
+
+# Stream the statistics of all the libraries as JSON: the counts by version and the status runs of each NID
+def write_json_stats(path, summaries, versions):
+    with open(path, 'w') as fd:
+        fd.write('{"versions": %s, "libraries": [' % json.dumps(versions))
+        first = True
+        for prx in sorted(summaries):
+            for lib in sorted(summaries[prx]):
+                summary = summaries[prx][lib]
+                byver = {ver: dict(summary["byver"][ver]["counts"], total=summary["byver"][ver]["total"], randomized=summary["byver"][ver]["obf"])
+                         for ver in summary["byver"]}
+                fd.write(('' if first else ',') + '\n' + json.dumps({"module": prx, "library": lib, "versions": byver, "nids": summary["nids"]}))
+                first = False
+        fd.write('\n]}\n')
 
-    return html_library(module, lib, stats_byver, versions)
+# Write the statistics of all the libraries as two CSV files: the counts by (module, library, version) and the status runs of each NID
+def write_csv_stats(folder, summaries):
+    os.makedirs(folder, exist_ok=True)
+    statuses = [status for (status, _, _) in HTML_STATUS]
+    with open(folder + '/library_counts.csv', 'w', newline='') as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["module", "library", "version", "total", "randomized"] + statuses)
+        for prx in sorted(summaries):
+            for lib in sorted(summaries[prx]):
+                byver = summaries[prx][lib]["byver"]
+                for ver in byver:
+                    counts = byver[ver]["counts"]
+                    writer.writerow([prx, lib, ver, byver[ver]["total"], int(byver[ver]["obf"])] + [counts.get(status, 0) for status in statuses])
+    with open(folder + '/nid_status.csv', 'w', newline='') as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["module", "library", "nid", "first_version", "last_version", "status", "name", "source"])
+        for prx in sorted(summaries):
+            for lib in sorted(summaries[prx]):
+                for nid in summaries[prx][lib]["nids"]:
+                    for run in nid["runs"]:
+                        writer.writerow([prx, lib, nid["nid"], run["first"], run["last"], run["status"], run["name"], run["source"]])
+
+def file_hash(path):
+    with open(path, 'rb') as fd:
+        return hashlib.sha1(fd.read()).hexdigest()
+
+# Load the NIDs of a XML file, grouped by module and library, along with the firmware versions they appear in
+def load_file(file):
+    nids = []
+    versions = set()
+    for e in psp_libdoc.loadPSPLibdoc(file):
+        cur_ver = [v for v in e.versions if not v.startswith('vita')]
+        for v in cur_ver:
+            versions.add(v)
+        if len(cur_ver) == 0:
+            continue
+        nids.append((e.prx, e.libraryName, {"nid": e.nid, "name": e.name, "versions": cur_ver, "source": e.source}))
+    libraries = list(dict.fromkeys((prx, lib) for (prx, lib, _) in nids))
+    return {"nids": nids, "libraries": libraries, "versions": sorted(versions)}
+
+def load_cache():
+    if not os.path.isfile(CACHE_FILE):
+        return {"files": {}, "libraries": {}}
+    with open(CACHE_FILE) as fd:
+        return json.load(fd)
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Only recompute the libraries whose XML files changed since the last run, reusing the cached statistics of the others')
+    parser.add_argument('--jsonPages', action='store_true',
+                        help='Write the table of each library as compact JSON, rendered client-side by a single viewer page, instead of a HTML page')
+    parser.add_argument('--json', type=str,
+                        help='Also export the statistics (counts by module, library and version, status of each NID) to the specified JSON file')
+    parser.add_argument('--csv', type=str,
+                        help='Also export the statistics to library_counts.csv and nid_status.csv in the specified folder')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='Number of processes computing the library statistics (0 for one per CPU)')
+    args = parser.parse_args(sys.argv[1:])
+
+    psp_libdoc.enableCache()
+
     # Create the folders for the HTML output
     os.makedirs(OUTPUT_HTML, exist_ok=True)
     os.makedirs(OUTPUT_HTML + "/modules", exist_ok=True)
 
-    # Parse all the NID export files
+    # Find the NID export files which changed since the last run (all of them if not incremental)
     filelist = glob.glob('PSPLibDoc/kd/*.xml') + glob.glob('PSPLibDoc/vsh/module/*.xml')
+    hashes = {file: file_hash(file) for file in filelist}
+    cache = load_cache() if args.incremental else {"files": {}, "libraries": {}}
+    cached_files = cache["files"]
+    dirty_files = [file for file in filelist if file not in cached_files or cached_files[file]["hash"] != hashes[file]]
 
-    nid_bylib = defaultdict(lambda: defaultdict(list))
-    versions = set()
+    # A library is dirty if it was or is now in a changed or removed file, or if its page is missing
+    loaded = {file: load_file(file) for file in dirty_files}
+    dirty_libs = set()
+    for file in dirty_files:
+        dirty_libs.update(loaded[file]["libraries"])
+    for file in cached_files:
+        if file not in hashes or file in loaded:
+            dirty_libs.update(tuple(lib) for lib in cached_files[file]["libraries"])
+    # (or if the NID statuses are exported but were not cached)
+    nid_status = args.json is not None or args.csv is not None
+    for prx in cache["libraries"]:
+        for lib in cache["libraries"][prx]:
+            if not os.path.isfile(library_file(prx, lib, args.jsonPages)) or (nid_status and "nids" not in cache["libraries"][prx][lib]):
+                dirty_libs.add((prx, lib))
 
+    # Parse all the files containing a dirty library, in the same order as for a full run
+    file_info = {}
+    nid_bylib = defaultdict(lambda: defaultdict(list))
     for file in filelist:
-        entries = psp_libdoc.loadPSPLibdoc(file)
-        for e in entries:
-            cur_ver = [v for v in e.versions if not v.startswith('vita')]
-            for v in cur_ver:
-                versions.add(v)
-            if len(cur_ver) == 0:
-                continue
-            nid_bylib[e.prx][e.libraryName].append({"nid": e.nid, "name": e.name, "versions": cur_ver, "source": e.source})
+        if file in loaded or any(tuple(lib) in dirty_libs for lib in cached_files[file]["libraries"]):
+            if file not in loaded:
+                loaded[file] = load_file(file)
+            for (prx, lib, nid) in loaded[file]["nids"]:
+                if (prx, lib) in dirty_libs:
+                    nid_bylib[prx][lib].append(nid)
+            file_info[file] = {"hash": hashes[file], "libraries": loaded[file]["libraries"], "versions": loaded[file]["versions"]}
+        else:
+            file_info[file] = cached_files[file]
+
+    # Recompute the statistics and rewrite the single HTML pages of the dirty libraries only
+    summaries = cache["libraries"]
+    for (prx, lib) in dirty_libs:
+        if prx in summaries:
+            summaries[prx].pop(lib, None)
+    # Libraries are independent, so they are handled across a process pool, results keep the sorted order
+    dirty = [(prx, lib) for prx in sorted(nid_bylib) for lib in sorted(nid_bylib[prx])]
+    modules = [prx for (prx, _) in dirty]
+    libs = [lib for (_, lib) in dirty]
+    nids = [nid_bylib[prx][lib] for (prx, lib) in dirty]
+    handle = functools.partial(handle_library, json_pages=args.jsonPages, nid_status=nid_status)
+    if args.jobs == 1:
+        results = list(map(handle, modules, libs, nids))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs or None) as executor:
+            results = list(executor.map(handle, modules, libs, nids, chunksize=8))
+    for ((prx, lib), summary) in zip(dirty, results):
+        summaries.setdefault(prx, {})[lib] = summary
+    summaries = {prx: summaries[prx] for prx in summaries if len(summaries[prx]) > 0}
 
-    versions = list(sorted(versions))
+    versions = psp_firmware.sortVersions(set([v for file in file_info for v in file_info[file]["versions"]]))
 
-    # Output the main and single HTML pages
-    html_output = html_header(versions)
-    for prx in sorted(nid_bylib):
-        for lib in sorted(nid_bylib[prx]):
-            html_output += handle_library(prx, lib, nid_bylib[prx][lib], versions)
-    html_output += html_footer()
+    # Output the main page, row by row
     with open(OUTPUT_HTML + "/index.html", 'w') as fd:
-        fd.write(html_output)
+        fd.writelines(html_header(versions))
+        for prx in sorted(summaries):
+            for lib in sorted(summaries[prx]):
+                fd.writelines(html_library(prx, lib, summaries[prx][lib], versions, args.jsonPages))
+        fd.writelines(html_footer())
+    if args.jsonPages:
+        with open(OUTPUT_HTML + "/modules/" + LIBRARY_VIEWER, 'w') as fd:
+            fd.write(LIBRARY_VIEWER_HTML)
+
+    if args.json is not None:
+        write_json_stats(args.json, summaries, versions)
+    if args.csv is not None:
+        write_csv_stats(args.csv, summaries)
+
+    with open(CACHE_FILE, 'w') as fd:
+        json.dump({"files": file_info, "libraries": summaries}, fd)
 
 if __name__ == '__main__':
     main()
-
@@ -4,21 +4,40 @@
 # Usage example: ./match-nids.py PSPLibDoc/kd/ata.xml 620.PBP/F0/kd/ata.prx 630.PBP/F0/kd/ata.prx
 
 from collections import defaultdict
+import concurrent.futures
+import hashlib
+import heapq
 import Levenshtein
+import os
 import psp_libdoc
 import re
 import subprocess
 import sys
 
-# Run prxtool on a .prx file
+# Folder caching the output of prxtool, by SHA-1 hash of the .prx file
+PRXTOOL_CACHE = ".prxtool_cache"
+
+# Run prxtool on a .prx file, or read its output from the cache if the file was already disassembled
 def run_prxtool(binary_path):
-    return subprocess.check_output(["prxtool", "-w", binary_path], stderr=subprocess.DEVNULL).decode('ascii')
+    with open(binary_path, 'rb') as f:
+        cache_path = os.path.join(PRXTOOL_CACHE, hashlib.sha1(f.read()).hexdigest() + '.txt')
+    if os.path.isfile(cache_path):
+        with open(cache_path) as f:
+            return f.read()
+
+    data = subprocess.check_output(["prxtool", "-w", binary_path], stderr=subprocess.DEVNULL).decode('ascii')
+    os.makedirs(PRXTOOL_CACHE, exist_ok=True)
+    # Write to a temporary file first so that a concurrent reader never sees a partial output
+    tmp_path = cache_path + '.' + str(os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, cache_path)
+    return data
 
 # Get the raw disassembly (without addresses) of the functions of a .prx file
 def get_raw_functions(binary_path):
     data = run_prxtool(binary_path)
-    funs = defaultdict(str)
-    cur_fun = None
+    funs = defaultdict(list)
     names = []
     for line in data.split('\n'):
         if 'Subroutine' in line:
@@ -32,57 +51,84 @@ def get_raw_functions(binary_path):
             m = re.match(r"\t0x[0-9A-F]{8}: 0x([0-9A-F]{8})", line)
             data = m.groups()[0]
             for n in names:
-                funs[n] += data
+                funs[n].append(data)
         elif '; Imported from' in line:
             break
-    return funs
+    return {n: ''.join(code) for (n, code) in funs.items()}
+
+# Get the functions of many .prx files, each file being disassembled once, across a process pool (jobs=None for one process per CPU)
+def get_all_raw_functions(paths, jobs=None):
+    paths = list(dict.fromkeys(paths))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return dict(zip(paths, executor.map(get_raw_functions, paths)))
+
+# Group the functions of a module by library, keeping their order and giving them a global index
+def group_by_library(funs):
+    groups = defaultdict(list)
+    for (idx, (name, code)) in enumerate(funs.items()):
+        groups[name[:-8]].append((idx, name, code))
+    return groups
 
 # Match the functions of two module (versions) by repeatedly finding the closest pairs
 def match_module_pair(path1, path2):
-    # Find the functions of both modules, ignoring unexported functions
-    funs1 = {k: v for k, v in get_raw_functions(path1).items() if not (k.startswith('sub_') or k.startswith('loc_') or k.startswith('module_'))}
-    funs2 = {k: v for k, v in get_raw_functions(path2).items() if not (k.startswith('sub_') or k.startswith('loc_') or k.startswith('module_'))}
-    distances = defaultdict(dict)
+    return match_functions(get_raw_functions(path1), get_raw_functions(path2))
+
+# Match the functions (as returned by get_raw_functions) of two module versions
+# Pairs are taken by increasing distance, ties being broken by the order of the functions in each module
+def match_functions(all_funs1, all_funs2):
+    # Ignore unexported functions
+    funs1 = {k: v for k, v in all_funs1.items() if not (k.startswith('sub_') or k.startswith('loc_') or k.startswith('module_'))}
+    funs2 = {k: v for k, v in all_funs2.items() if not (k.startswith('sub_') or k.startswith('loc_') or k.startswith('module_'))}
+    groups1 = group_by_library(funs1)
+    groups2 = group_by_library(funs2)
+
+    # Functions with an identical body are at distance 0, so they are matched first, without computing any distance
+    result = {}
+    matched1 = set()
+    matched2 = set()
+    zero_pairs = []
+    for (lib, group1) in groups1.items():
+        by_body = defaultdict(list)
+        for (idx2, f2, c2) in groups2.get(lib, []):
+            by_body[c2].append((idx2, f2))
+        for (idx1, f1, c1) in group1:
+            for (idx2, f2) in by_body.get(c1, []):
+                if idx2 not in matched2:
+                    matched1.add(idx1)
+                    matched2.add(idx2)
+                    zero_pairs.append((idx1, f1, f2))
+                    break
+    for (_, f1, f2) in sorted(zero_pairs):
+        result[f1] = f2
+
     print('computing distances...')
-    for (f1, c1) in funs1.items():
-        lib1 = f1[:-8]
-        for (f2, c2) in funs2.items():
-            lib2 = f2[:-8]
-            if lib1 != lib2:
-                continue
-            distances[f1][f2] = Levenshtein.distance(c1, c2)
+    heap = []
+    for (lib, group1) in groups1.items():
+        group2 = [(idx2, f2, c2) for (idx2, f2, c2) in groups2.get(lib, []) if idx2 not in matched2]
+        for (idx1, f1, c1) in group1:
+            if idx1 not in matched1:
+                for (idx2, f2, c2) in group2:
+                    heap.append((Levenshtein.distance(c1, c2), idx1, idx2, f1, f2))
+    heapq.heapify(heap)
 
     print('associating functions...')
-    result = {}
-    while len(funs1) > 0 and len(funs2) > 0:
-        closest_pair = None
-        min_dist = None
-        for (f1, c1) in funs1.items():
-            lib1 = f1[:-8]
-            for (f2, c2) in funs2.items():
-                lib2 = f2[:-8]
-                # Only match functions belonging to the same library
-                if lib1 != lib2:
-                    continue
-                cur_dist = distances[f1][f2]
-                if min_dist is None or cur_dist < min_dist:
-                    min_dist = cur_dist
-                    closest_pair = (f1, f2)
-        if closest_pair is None: # could happen if the two remaining functions are in different libraries
-            break
-        #print(closest_pair, min_dist)
-        del funs1[closest_pair[0]]
-        del funs2[closest_pair[1]]
-        result[closest_pair[0]] = closest_pair[1]
+    while heap:
+        (dist, idx1, idx2, f1, f2) = heapq.heappop(heap)
+        if idx1 in matched1 or idx2 in matched2:
+            continue
+        matched1.add(idx1)
+        matched2.add(idx2)
+        result[f1] = f2
     # Return a dictionary of (name of function in path1) -> (name of function in path2)
     return result
 
 # Match pairs of NIDs for a sequence of versions of modules
-def match_modules(paths):
+def match_modules(paths, jobs=None):
+    functions = get_all_raw_functions(paths, jobs)
     results = []
     for (path1, path2) in zip(paths, paths[1:]):
         print("check", path1, path2)
-        results.append(match_module_pair(path1, path2))
+        results.append(match_functions(functions[path1], functions[path2]))
         print(results[-1])
 
     checked = set()
@@ -0,0 +1,96 @@
+# Registry of the PSP and PS Vita (ePSP) firmware versions, with their canonical ordering and version bitmasks
+
+import functools
+import re
+
+PSP_FIRMWARES = ["1.00", "1.03", "1.50", "1.51", "1.52", "2.00", "2.01", "2.50", "2.60", "2.70", "2.71", "2.80", "2.81", "2.82",
+				 "3.00", "3.01", "3.02", "3.03", "3.10", "3.11", "3.30", "3.40", "3.50", "3.51", "3.52", "3.60", "3.70", "3.71",
+				 "3.72", "3.73", "3.80", "3.90", "3.93", "3.95", "3.96", "4.00", "4.01", "4.05", "4.20", "4.21", "5.00", "5.01",
+				 "5.02", "5.03", "5.05", "5.50", "5.51", "5.55", "5.70", "6.00", "6.10", "6.20", "6.30", "6.31", "6.35", "6.36",
+				 "6.37", "6.38", "6.39", "6.60", "6.61"]
+
+VITA_FIRMWARES = ["vita-0.931", "vita-0.940", "vita-0.945", "vita-0.990", "vita-0.995", "vita-0.996", "vita-1.03", "vita-1.04",
+				  "vita-1.05", "vita-1.06", "vita-1.50", "vita-1.51", "vita-1.52", "vita-1.60", "vita-1.61", "vita-1.65", "vita-1.66",
+				  "vita-1.67", "vita-1.69.0", "vita-1.69.1", "vita-1.69.2", "vita-1.80", "vita-1.81", "vita-2.00", "vita-2.01",
+				  "vita-2.02", "vita-2.05", "vita-2.06", "vita-2.10", "vita-2.11", "vita-2.12", "vita-2.50", "vita-2.60", "vita-2.61",
+				  "vita-3.00", "vita-3.01", "vita-3.10", "vita-3.12", "vita-3.15", "vita-3.18", "vita-3.30", "vita-3.35", "vita-3.36",
+				  "vita-3.50", "vita-3.51", "vita-3.52", "vita-3.55", "vita-3.57", "vita-3.60", "vita-3.61", "vita-3.63", "vita-3.65",
+				  "vita-3.67", "vita-3.68", "vita-3.69", "vita-3.70", "vita-3.71", "vita-3.72", "vita-3.73"]
+
+FIRMWARES = PSP_FIRMWARES + VITA_FIRMWARES
+
+@functools.lru_cache(maxsize=None)
+def versionKey(version):
+	"""Sort key of a firmware version: PSP versions first, then PS Vita ones, each in numeric order."""
+	isVita = version.startswith('vita-')
+	parts = version.removeprefix('vita-').split('.')
+	if not all(re.fullmatch(r'[0-9]+', part) for part in parts):
+		return (2, (), version)
+	return (1 if isVita else 0, tuple(int(part) for part in parts), version)
+
+def sortVersions(versions):
+	return sorted(versions, key=versionKey)
+
+class FirmwareRegistry:
+	"""Assign a bit to each firmware version, so that a set of versions can be stored as an integer bitmask.
+
+	Bits are given in registration order (the known firmwares first), versions not known yet are registered
+	when first seen. Versions decoded from a mask are always given in canonical order.
+	"""
+	def __init__(self, versions=FIRMWARES):
+		self.versions = []
+		self.bits = {}
+		self._canonical = None
+		for version in versions:
+			self.bit(version)
+
+	def bit(self, version):
+		bit = self.bits.get(version)
+		if bit is None:
+			bit = len(self.versions)
+			self.versions.append(version)
+			self.bits[version] = bit
+			self._canonical = None
+		return bit
+
+	def mask(self, versions):
+		mask = 0
+		for version in versions:
+			mask |= 1 << self.bit(version)
+		return mask
+
+	def canonicalBits(self):
+		"""Return the bits of all the registered versions, in canonical version order."""
+		if self._canonical is None:
+			self._canonical = [self.bits[version] for version in sortVersions(self.versions)]
+		return self._canonical
+
+	def versionsOf(self, mask):
+		return [self.versions[bit] for bit in self.canonicalBits() if (mask >> bit) & 1]
+
+	def ranges(self, mask):
+		"""Return the (first, last) versions of each run of consecutive registered versions in the mask.
+
+		Runs do not span PSP and PS Vita versions.
+		"""
+		ranges = []
+		first = last = None
+		for bit in self.canonicalBits():
+			version = self.versions[bit]
+			if first is not None and (not (mask >> bit) & 1 or versionKey(version)[0] != versionKey(last)[0]):
+				ranges.append((first, last))
+				first = None
+			if (mask >> bit) & 1:
+				if first is None:
+					first = version
+				last = version
+		if first is not None:
+			ranges.append((first, last))
+		return ranges
+
+	def formatRanges(self, mask):
+		"""Range-compressed representation of a mask, e.g. "1.00-3.60, 5.00"."""
+		return ", ".join(first if first == last else first + "-" + last for (first, last) in self.ranges(mask))
+
+# Registry shared by all the tools
+registry = FirmwareRegistry()
@@ -1,50 +1,274 @@
 #! /usr/bin/env python3
 
 import argparse
+import array
+import concurrent.futures
+import contextlib
+import gzip
 import hashlib
+import io
 import itertools
+import json
 import os
 import re
+import sqlite3
+import struct
 import sys
 
 from collections import namedtuple
 from lxml import etree as ET
+from psp_firmware import registry, sortVersions, versionKey
+from psp_nid import compute_nid, compute_nid_int, compute_nids
+from psp_nid_lookup import writeLookupFile
 
 NIDEntry = namedtuple('NIDEntry', ['nidtype', 'nid', 'name', 'prx', 'prxName', 'libraryName', 'libraryFlags', 'versions', 'source'])
 
-def compute_nid(name):
-	return hashlib.sha1(name.encode('ascii')).digest()[:4][::-1].hex().upper()
+def _loadNIDElement(element, nidtype, prxFile, prxName, libraryName, libraryFlags):
+	# Read the children once instead of searching the element for each of them
+	children = {}
+	for child in element:
+		children.setdefault(child.tag, child)
+	nid = children["NID"].text.upper().removeprefix('0X')
+	name = children["NAME"].text
+	versions = [x.text for x in children["VERSIONS"].iterchildren("VERSION")] if "VERSIONS" in children else []
+	source_elem = children.get("SOURCE")
+	source = '' if source_elem is None else ('' if source_elem.text is None else source_elem.text)
+	return NIDEntry(nidtype=nidtype, nid=nid, name=name, prx=prxFile, prxName=prxName,
+					libraryName=libraryName, libraryFlags=libraryFlags, versions=versions, source=source)
+
+def _freeElement(element):
+	# Drop the element content and all the already processed siblings, so that memory stays bounded
+	element.clear()
+	while element.getprevious() is not None:
+		del element.getparent()[0]
+
+# Stream the NID entries of a PSP-Libdoc XML file, yielding them as their element closes
+# Entries are yielded in the same order as loadPSPLibdoc (functions before variables for each library),
+# but processed elements are freed as the file is read, so memory use does not depend on the file size
+def iterPSPLibdoc(xmlFile):
+	# PRX and library fields of the current library, read from the parents of its first entry
+	libraryFields = None
+	variables = []
+	context = ET.iterparse(xmlFile, events=('end',), tag=('FUNCTION', 'VARIABLE', 'LIBRARY', 'PRXFILE'))
+	for event, element in context:
+		tag = element.tag
+		parentTag = element.getparent().tag
+		if (tag == 'FUNCTION' and parentTag == 'FUNCTIONS') or (tag == 'VARIABLE' and parentTag == 'VARIABLES'):
+			if libraryFields is None:
+				library = element.getparent().getparent()
+				prx = library.getparent().getparent()
+				libraryFields = (prx.find("PRX").text, prx.find("PRXNAME").text, library.find("NAME").text, library.find("FLAGS").text)
+			if tag == 'FUNCTION':
+				yield _loadNIDElement(element, 'fun', *libraryFields)
+			else:
+				variables.append(_loadNIDElement(element, 'var', *libraryFields))
+			_freeElement(element)
+		elif tag == 'LIBRARY' and parentTag == 'LIBRARIES':
+			yield from variables
+			variables = []
+			libraryFields = None
+			_freeElement(element)
+		elif tag == 'PRXFILE' and parentTag == 'PRXFILES':
+			_freeElement(element)
+	del context
+
+# Compact columnar storage of NID entries, with the same iteration interface as a list of NIDEntry
+# Strings are interned in a single table and each string field is an array of indices into it, NIDs are stored
+# as 32-bit integers and version lists as interned bitmasks of the firmware registry, so that checking whether
+# an entry exists in a firmware version is a bit test. Entries are given back as NIDEntry tuples, with their
+# versions in canonical order
+class NIDStore:
+	STRING_FIELDS = ('nidtype', 'name', 'prx', 'prxName', 'libraryName', 'libraryFlags', 'source')
+
+	def __init__(self, nidEntries=()):
+		self.strings = []
+		self.stringIds = {}
+		self.columns = [array.array('I') for _ in self.STRING_FIELDS]
+		self.prxColumn = self.columns[self.STRING_FIELDS.index('prx')]
+		self.libraryColumn = self.columns[self.STRING_FIELDS.index('libraryName')]
+		self.nids = array.array('I')
+		# NIDs which are not 8 hex digits are kept as strings, by entry index
+		self.rawNids = {}
+		self.masks = []
+		self.maskIds = {}
+		self.maskVersions = []
+		# Mask index of each list of versions already appended, most entries of a file share a few lists
+		self.versionsMaskIds = {}
+		self.maskColumn = array.array('I')
+		self.extend(nidEntries)
+
+	def _intern(self, string):
+		stringId = self.stringIds.get(string)
+		if stringId is None:
+			stringId = len(self.strings)
+			self.strings.append(string)
+			self.stringIds[string] = stringId
+		return stringId
+
+	def _internMask(self, mask):
+		maskId = self.maskIds.get(mask)
+		if maskId is None:
+			maskId = len(self.masks)
+			self.masks.append(mask)
+			self.maskIds[mask] = maskId
+			self.maskVersions.append(registry.versionsOf(mask))
+		return maskId
+
+	def append(self, entry):
+		for (column, field) in zip(self.columns, self.STRING_FIELDS):
+			column.append(self._intern(getattr(entry, field)))
+		if len(entry.nid) == 8:
+			self.nids.append(int(entry.nid, 16))
+		else:
+			self.rawNids[len(self.nids)] = entry.nid
+			self.nids.append(0)
+		versions = tuple(entry.versions)
+		maskId = self.versionsMaskIds.get(versions)
+		if maskId is None:
+			maskId = self.versionsMaskIds[versions] = self._internMask(registry.mask(versions))
+		self.maskColumn.append(maskId)
+
+	def extend(self, nidEntries):
+		for entry in nidEntries:
+			self.append(entry)
+
+	def __len__(self):
+		return len(self.nids)
+
+	def __getitem__(self, idx):
+		if idx < 0:
+			idx += len(self.nids)
+		strings = self.strings
+		nidtype, name, prx, prxName, libraryName, libraryFlags, source = [strings[column[idx]] for column in self.columns]
+		nid = self.rawNids[idx] if idx in self.rawNids else '%08X' % self.nids[idx]
+		return NIDEntry(nidtype, nid, name, prx, prxName, libraryName, libraryFlags, list(self.maskVersions[self.maskColumn[idx]]), source)
+
+	def __iter__(self):
+		return self._iterEntries(range(len(self.nids)))
+
+	# Same as self[idx] for each index, with the tables looked up once
+	def _iterEntries(self, indices):
+		strings, nids, rawNids, maskVersions, maskColumn = self.strings, self.nids, self.rawNids, self.maskVersions, self.maskColumn
+		nidtypes, names, prxs, prxNames, libraryNames, libraryFlags, sources = self.columns
+		for idx in indices:
+			nid = rawNids[idx] if idx in rawNids else '%08X' % nids[idx]
+			yield NIDEntry(strings[nidtypes[idx]], nid, strings[names[idx]], strings[prxs[idx]], strings[prxNames[idx]],
+						   strings[libraryNames[idx]], strings[libraryFlags[idx]], list(maskVersions[maskColumn[idx]]), strings[sources[idx]])
+
+	# Sorted (key of sortPSPLibdocEntries, index) pairs of entry indices, the keys being computed from the columns
+	def sortedKeys(self, indices):
+		strings, nids, rawNids = self.strings, self.nids, self.rawNids
+		prxColumn, libraryColumn, maskColumn = self.prxColumn, self.libraryColumn, self.maskColumn
+		firstKeys = {}
+		keys = []
+		for idx in indices:
+			maskId = maskColumn[idx]
+			firstKey = firstKeys.get(maskId)
+			if firstKey is None:
+				firstKey = firstKeys[maskId] = versionKey(self.maskVersions[maskId][0])
+			nid = int(rawNids[idx], 16) if idx in rawNids else nids[idx]
+			keys.append(((strings[prxColumn[idx]], strings[libraryColumn[idx]], firstKey, nid), idx))
+		keys.sort()
+		return keys
+
+	# Yield the entries (existing in the given firmware version) in the order of sortPSPLibdocEntries
+	# Equal keys are ordered by index, so that the result is the same as a stable sort of the entries
+	def iterSorted(self, version=None):
+		bit = None if version is None else registry.bits.get(version)
+		if version is not None and bit is None:
+			return
+		indices = range(len(self.nids))
+		if bit is not None:
+			masks, maskColumn = self.masks, self.maskColumn
+			indices = [idx for idx in indices if (masks[maskColumn[idx]] >> bit) & 1]
+		yield from self._iterEntries(idx for (_, idx) in self.sortedKeys(indices))
+
+# Yield the entries of a list of NIDEntry which exist in the given firmware version
+def filterVersion(nidEntries, version):
+	return (entry for entry in nidEntries if version in entry.versions)
+
+DEFAULT_CACHE_FILE = '.psp_libdoc_cache.sqlite'
+# Stored as the user_version of the cache database, to be increased when the tables or the parsing of the files change
+CACHE_FORMAT_VERSION = 1
+
+# On-disk cache of the NID entries of PSP-Libdoc XML files, stored in a SQLite database
+# A file is served from the cache as long as its mtime and size are unchanged, or, if they did change,
+# as long as its content hash is still the same. Otherwise the caller has to parse it again
+class NIDCache:
+	def __init__(self, cacheFile):
+		# The server reloads files from its polling thread, its accesses are serialized by the server
+		self.connection = sqlite3.connect(cacheFile, timeout=60, check_same_thread=False)
+		# A cache written in another format is emptied, in a single transaction with other processes opening it
+		self.connection.execute("BEGIN IMMEDIATE")
+		if self.connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_FORMAT_VERSION:
+			self.connection.execute("DROP TABLE IF EXISTS files")
+			self.connection.execute("DROP TABLE IF EXISTS entries")
+			self.connection.execute("PRAGMA user_version = {}".format(CACHE_FORMAT_VERSION))
+		self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, hash TEXT)")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS entries (path TEXT, seq INTEGER, nidtype TEXT, nid TEXT, name TEXT, prx TEXT, "
+								"prxName TEXT, libraryName TEXT, libraryFlags TEXT, versions TEXT, source TEXT, PRIMARY KEY (path, seq))")
+		self.connection.commit()
+
+	@staticmethod
+	def fileHash(xmlFile):
+		with open(xmlFile, 'rb') as f:
+			return hashlib.sha1(f.read()).hexdigest()
+
+	def load(self, xmlFile):
+		path = os.path.abspath(xmlFile)
+		stat = os.stat(path)
+		row = self.connection.execute("SELECT mtime, size, hash FROM files WHERE path = ?", (path,)).fetchone()
+		if row is None:
+			return None
+
+		mtime, size, fileHash = row
+		if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+			if self.fileHash(path) != fileHash:
+				return None
+			with self.connection:
+				self.connection.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?", (stat.st_mtime_ns, stat.st_size, path))
+
+		rows = self.connection.execute("SELECT nidtype, nid, name, prx, prxName, libraryName, libraryFlags, versions, source "
+									   "FROM entries WHERE path = ? ORDER BY seq", (path,))
+		return [NIDEntry(nidtype, nid, name, prx, prxName, libraryName, libraryFlags, versions.split(',') if versions else [], source)
+				for (nidtype, nid, name, prx, prxName, libraryName, libraryFlags, versions, source) in rows]
+
+	def store(self, xmlFile, entries):
+		path = os.path.abspath(xmlFile)
+		stat = os.stat(path)
+		with self.connection:
+			self.connection.execute("DELETE FROM entries WHERE path = ?", (path,))
+			self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+									(path, stat.st_mtime_ns, stat.st_size, self.fileHash(path)))
+			self.connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+										[(path, seq, e.nidtype, e.nid, e.name, e.prx, e.prxName, e.libraryName,
+										  e.libraryFlags, ','.join(e.versions), e.source) for (seq, e) in enumerate(entries)])
+
+	def close(self):
+		self.connection.close()
+
+# Cache used by loadPSPLibdoc, if enabled
+libdocCache = None
+
+def enableCache(cacheFile=DEFAULT_CACHE_FILE):
+	global libdocCache
+	disableCache()
+	libdocCache = NIDCache(cacheFile)
+
+def disableCache():
+	global libdocCache
+	if libdocCache is not None:
+		libdocCache.close()
+	libdocCache = None
 
 def loadPSPLibdoc(xmlFile):
-	tree = ET.parse(xmlFile)
-	root = tree.getroot()
-
-	entries = []
-	for prx in root.findall("PRXFILES/PRXFILE"):
-		prxFile = prx.find("PRX").text
-		prxName = prx.find("PRXNAME").text
-		for library in prx.findall("LIBRARIES/LIBRARY"):
-			libraryName = library.find("NAME").text
-			libraryFlags = library.find("FLAGS").text
-			for function in library.findall("FUNCTIONS/FUNCTION"):
-				functionNID = function.find("NID").text.upper().removeprefix('0X')
-				functionName = function.find("NAME").text
-				versions = [x.text for x in function.findall("VERSIONS/VERSION")]
-				source_elem = function.find("SOURCE")
-				source = '' if source_elem is None else ('' if source_elem.text is None else source_elem.text)
-				entries.append(NIDEntry(nidtype='fun', nid=functionNID, name=functionName, prx=prxFile,
-										prxName=prxName, libraryName=libraryName, libraryFlags=libraryFlags,
-										versions=versions, source=source))
-			for variable in library.findall("VARIABLES/VARIABLE"):
-				variableNID = variable.find("NID").text.upper().removeprefix('0X')
-				variableName = variable.find("NAME").text
-				versions = [x.text for x in variable.findall("VERSIONS/VERSION")]
-				source_elem = variable.find("SOURCE")
-				source = '' if source_elem is None else ('' if source_elem.text is None else source_elem.text)
-				entries.append(NIDEntry(nidtype='var', nid=variableNID, name=variableName, prx=prxFile,
-										prxName=prxName, libraryName=libraryName, libraryFlags=libraryFlags,
-										versions=versions, source=source))
+	if libdocCache is None:
+		return list(iterPSPLibdoc(xmlFile))
 
+	entries = libdocCache.load(xmlFile)
+	if entries is None:
+		entries = list(iterPSPLibdoc(xmlFile))
+		libdocCache.store(xmlFile, entries)
 	return entries
 
 def updatePSPLibdoc(nidEntries, xmlFile, version=None):
@@ -60,12 +284,18 @@ def updatePSPLibdoc(nidEntries, xmlFile, version=None):
 	for entry in nidEntries:
 		entries[entry.nid] = entry
 
+	# Index the entries by PRX and library (keeping their order) so that each PRX and library only looks at its own entries
+	entriesByPrx = {}
+	for (nid, entry) in entries.items():
+		entriesByPrx.setdefault(entry.prx, {}).setdefault(entry.libraryName, []).append((nid, entry))
+
 	for prx in root.findall("PRXFILES/PRXFILE"):
 		prxFile = prx.find("PRX").text
-		libraryList = []
+		prxEntries = entriesByPrx.get(prxFile, {})
+		libraryList = set()
 		for library in prx.findall("LIBRARIES/LIBRARY"):
 			libraryName = library.find("NAME").text
-			libraryList.append(libraryName)
+			libraryList.add(libraryName)
 			for funvar in library.findall("FUNCTIONS/FUNCTION") + library.findall("VARIABLES/VARIABLE"):
 				numTotalFunctions = numTotalFunctions + 1
 				funvarNID = funvar.find("NID").text.upper().removeprefix('0X')
@@ -85,12 +315,17 @@ def updatePSPLibdoc(nidEntries, xmlFile, version=None):
 						funvar.find("NAME").text = nidEntry.name
 
 					if version is not None:
-						newver = sorted(set([x.text for x in funvar.findall("VERSIONS/VERSION")] + [version]))
+						# Insert the new version at its place in the (already ordered) list, instead of rewriting it
 						versions = funvar.find("VERSIONS")
-						for v in versions.findall("VERSION"):
-							versions.remove(v)
-						for v in newver:
-							ET.SubElement(versions, "VERSION").text = v
+						existing = versions.findall("VERSION")
+						if version not in [v.text for v in existing]:
+							later = [v for v in existing if versionKey(v.text) > versionKey(version)]
+							newVersion = ET.Element("VERSION")
+							newVersion.text = version
+							if later:
+								later[0].addprevious(newVersion)
+							else:
+								versions.append(newVersion)
 
 					if len(nidEntry.source) > 0:
 						if funvar.find("SOURCE") is not None:
@@ -98,30 +333,30 @@ def updatePSPLibdoc(nidEntries, xmlFile, version=None):
 						else:
 							ET.SubElement(funvar, "SOURCE").text = nidEntry.source
 
-		for nid in entries:
-			if entries[nid].prx == prxFile and entries[nid].libraryName not in libraryList:
+		for (libraryName, libraryEntries) in prxEntries.items():
+			if libraryName not in libraryList:
 				libs = prx.find("LIBRARIES")
 				lib = ET.SubElement(libs, "LIBRARY")
-				ET.SubElement(lib, "NAME").text = entries[nid].libraryName
-				ET.SubElement(lib, "FLAGS").text = entries[nid].libraryFlags
-				libraryList.append(entries[nid].libraryName)
+				ET.SubElement(lib, "NAME").text = libraryName
+				ET.SubElement(lib, "FLAGS").text = libraryEntries[0][1].libraryFlags
+				libraryList.add(libraryName)
 
 		for library in prx.findall("LIBRARIES/LIBRARY"):
 			libraryName = library.find("NAME").text
-			nidList = []
+			nidList = set()
 			for (nidtype, funvar) in [('fun', x) for x in library.findall("FUNCTIONS/FUNCTION")] + [('var', x) for x in library.findall("VARIABLES/VARIABLE")]:
 				funvarNID = funvar.find("NID").text.upper().removeprefix('0X')
-				nidList.append((nidtype, funvarNID))
+				nidList.add((nidtype, funvarNID))
 
-			for nid in entries:
-				if entries[nid].libraryName == libraryName and entries[nid].prx == prxFile and (entries[nid].nidtype, nid) not in nidList:
-					name = "FUNCTION" if entries[nid].nidtype == 'fun' else "VARIABLE"
+			for (nid, entry) in prxEntries.get(libraryName, []):
+				if (entry.nidtype, nid) not in nidList:
+					name = "FUNCTION" if entry.nidtype == 'fun' else "VARIABLE"
 					funvars = library.find(name + "S")
 					if funvars is None:
 						funvars = ET.SubElement(library, name + "S")
 					funvar = ET.SubElement(funvars, name)
 					ET.SubElement(funvar, "NID").text = '0x' + nid.upper()
-					ET.SubElement(funvar, "NAME").text = entries[nid].name
+					ET.SubElement(funvar, "NAME").text = entry.name
 					versions = ET.SubElement(funvar, "VERSIONS")
 					ET.SubElement(versions, "VERSION").text = version
 
@@ -136,12 +371,8 @@ def updatePSPLibdoc(nidEntries, xmlFile, version=None):
 
 	tree.write(xmlFile, encoding='utf-8', method="xml", xml_declaration=True, pretty_print=True)
 
-def getNidForString(string):
-	sha1Hash = hashlib.sha1(bytes(string, 'utf-8'))
-	hashBytes = sha1Hash.digest()[0:4]
-	nid = hashBytes[::-1].hex().upper()
-
-	return nid
+# Kept for compatibility, see psp_nid.compute_nid
+getNidForString = compute_nid
 
 def loadPSPExportFile(exportFile):
 	with open(exportFile) as f:
@@ -221,6 +452,435 @@ def loadHLEFunctionFile(inputFile):
 
 	return entries
 
+# Packed format: the columns of a NIDStore in a single binary file, optionally gzip or zstd compressed
+PACKED_MAGIC = b'PSPLDB'
+PACKED_FORMAT_VERSION = 1
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+# Open a packed file, compressed according to its extension when writing and to its header when reading
+def _packedOpen(path, mode):
+	if mode == 'wb':
+		compressed = 'gzip' if path.endswith('.gz') else 'zstd' if path.endswith('.zst') else None
+	else:
+		with open(path, 'rb') as f:
+			header = f.read(4)
+		compressed = 'gzip' if header.startswith(b'\x1f\x8b') else 'zstd' if header == b'\x28\xb5\x2f\xfd' else None
+
+	if compressed == 'gzip':
+		return gzip.open(path, mode)
+	if compressed == 'zstd':
+		if zstandard is None:
+			raise RuntimeError("The zstandard module is required for zstd compressed packed files")
+		f = open(path, mode)
+		if mode == 'wb':
+			return zstandard.ZstdCompressor(level=19).stream_writer(f, closefd=True)
+		return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+	return open(path, mode)
+
+def _writePackedStrings(f, strings):
+	data = '\0'.join(strings).encode('utf-8')
+	f.write(struct.pack('<II', len(strings), len(data)))
+	f.write(data)
+
+def _readPackedStrings(f):
+	count, size = struct.unpack('<II', f.read(8))
+	return f.read(size).decode('utf-8').split('\0') if count else []
+
+def _writePackedArray(f, values):
+	# Each array uses the smallest unsigned type holding its values
+	typecode = 'B' if max(values, default=0) < 1 << 8 else 'H' if max(values) < 1 << 16 else 'I'
+	values = array.array(typecode, values)
+	if sys.byteorder == 'big':
+		values.byteswap()
+	f.write(struct.pack('<cI', typecode.encode('ascii'), len(values)))
+	f.write(values.tobytes())
+
+def _readPackedArray(f):
+	typecode, count = struct.unpack('<cI', f.read(5))
+	values = array.array(typecode.decode('ascii'))
+	values.frombytes(f.read(count * values.itemsize))
+	if sys.byteorder == 'big':
+		values.byteswap()
+	return array.array('I', values)
+
+# Write entries to a packed file: string table, columns of string indices, 32-bit NIDs and version bitsets
+# The versions are given by a table of the firmware versions used, in canonical order, each entry referring to
+# a bitset over this table. Files ending with .gz are gzip compressed, files ending with .zst zstd compressed
+def writePackedLibdoc(nidEntries, outFile):
+	store = nidEntries if isinstance(nidEntries, NIDStore) else NIDStore(nidEntries)
+	versions = sortVersions(set(v for maskVersions in store.maskVersions for v in maskVersions))
+	versionPos = dict((v, pos) for (pos, v) in enumerate(versions))
+	maskSize = (len(versions) + 7) // 8
+
+	with _packedOpen(outFile, 'wb') as f:
+		f.write(PACKED_MAGIC + struct.pack('<H', PACKED_FORMAT_VERSION))
+		_writePackedStrings(f, versions)
+		_writePackedStrings(f, store.strings)
+		f.write(struct.pack('<I', len(store.maskVersions)))
+		for maskVersions in store.maskVersions:
+			f.write(sum(1 << versionPos[v] for v in maskVersions).to_bytes(maskSize, 'little'))
+		for column in store.columns:
+			_writePackedArray(f, column)
+		_writePackedArray(f, store.maskColumn)
+		_writePackedArray(f, store.nids)
+		rawNids = sorted(store.rawNids.items())
+		_writePackedArray(f, [idx for (idx, _) in rawNids])
+		_writePackedStrings(f, [nid for (_, nid) in rawNids])
+
+# Load a file written by writePackedLibdoc into a NIDStore
+def loadPackedLibdoc(packedFile):
+	with _packedOpen(packedFile, 'rb') as f:
+		header = f.read(len(PACKED_MAGIC) + 2)
+		if not header.startswith(PACKED_MAGIC):
+			raise ValueError("{} is not a packed PSP-Libdoc file".format(packedFile))
+		formatVersion, = struct.unpack('<H', header[len(PACKED_MAGIC):])
+		if formatVersion != PACKED_FORMAT_VERSION:
+			raise ValueError("{} has an unsupported packed format version: {}".format(packedFile, formatVersion))
+
+		versions = _readPackedStrings(f)
+		maskSize = (len(versions) + 7) // 8
+		store = NIDStore()
+		store.strings = _readPackedStrings(f)
+		store.stringIds = dict((string, stringId) for (stringId, string) in enumerate(store.strings))
+		numMasks, = struct.unpack('<I', f.read(4))
+		for _ in range(numMasks):
+			bits = int.from_bytes(f.read(maskSize), 'little')
+			mask = registry.mask(v for (pos, v) in enumerate(versions) if (bits >> pos) & 1)
+			store.maskIds[mask] = len(store.masks)
+			store.masks.append(mask)
+			store.maskVersions.append(registry.versionsOf(mask))
+		store.columns = [_readPackedArray(f) for _ in store.STRING_FIELDS]
+		store.prxColumn = store.columns[store.STRING_FIELDS.index('prx')]
+		store.libraryColumn = store.columns[store.STRING_FIELDS.index('libraryName')]
+		store.maskColumn = _readPackedArray(f)
+		store.nids = _readPackedArray(f)
+		store.rawNids = dict(zip(_readPackedArray(f), _readPackedStrings(f)))
+	return store
+
+# Delta format: the entries of the first firmware version, then what each next version adds, removes and renames
+DELTAS_FORMAT_VERSION = 1
+
+def _deltasOpen(path, mode):
+	return gzip.open(path, mode, encoding='utf-8') if path.endswith('.gz') else open(path, mode, encoding='utf-8')
+
+# Firmware views stored as deltas over a table of records, the records being the entries without their versions
+# The view of a firmware version is the list of the records existing in that version, in record order, so that
+# it gives the same files as filtering the original entries by version
+class PSPLibdocDeltas:
+	RECORD_FIELDS = ('nidtype', 'nid', 'name', 'prx', 'prxName', 'libraryName', 'libraryFlags', 'source')
+
+	def __init__(self, records, base, deltas):
+		self.records = records
+		self.base = base
+		self.deltas = deltas
+		self.versions = [base["version"]] + [delta["version"] for delta in deltas] if base is not None else []
+
+	@classmethod
+	def fromEntries(cls, nidEntries):
+		records = []
+		members = {}
+		for (idx, entry) in enumerate(nidEntries):
+			records.append([getattr(entry, field) for field in cls.RECORD_FIELDS])
+			for version in entry.versions:
+				members.setdefault(version, []).append(idx)
+
+		versions = sortVersions(members)
+		if not versions:
+			return cls(records, None, [])
+
+		base = {"version": versions[0], "entries": members[versions[0]]}
+		deltas = []
+		for (previous, version) in zip(versions, versions[1:]):
+			previousSet = set(members[previous])
+			currentSet = set(members[version])
+			added = sorted(currentSet - previousSet)
+			removed = sorted(previousSet - currentSet)
+
+			# A removed record and an added one with the same PRX, library and NID (and nothing else in common) is a rename
+			def renameKey(idx):
+				record = records[idx]
+				return (record[0], record[1], record[3], record[5], record[6])
+			removedByKey = {}
+			for idx in removed:
+				removedByKey.setdefault(renameKey(idx), []).append(idx)
+			addedByKey = {}
+			for idx in added:
+				addedByKey.setdefault(renameKey(idx), []).append(idx)
+			renamed = [(removedByKey[key][0], idxs[0]) for (key, idxs) in addedByKey.items() if len(idxs) == 1 and len(removedByKey.get(key, [])) == 1]
+			renamedOld = set(old for (old, _) in renamed)
+			renamedNew = set(new for (_, new) in renamed)
+
+			deltas.append({"version": version,
+						   "add": [idx for idx in added if idx not in renamedNew],
+						   "remove": [idx for idx in removed if idx not in renamedOld],
+						   "rename": sorted(renamed)})
+		return cls(records, base, deltas)
+
+	def _applyDelta(self, current, delta):
+		current.difference_update(delta["remove"])
+		current.update(delta["add"])
+		for (old, new) in delta["rename"]:
+			current.discard(old)
+			current.add(new)
+
+	# Yield the (version, record indices) view of each firmware version, applying the deltas one after the other
+	def iterViews(self):
+		if self.base is None:
+			return
+		current = set(self.base["entries"])
+		yield (self.base["version"], sorted(current))
+		for delta in self.deltas:
+			self._applyDelta(current, delta)
+			yield (delta["version"], sorted(current))
+
+	def _entry(self, idx, versions):
+		return NIDEntry(*self.records[idx][:7], versions=versions, source=self.records[idx][7])
+
+	# Return the entries existing in a firmware version, with their full list of versions, in record order
+	def view(self, version):
+		if version not in self.versions:
+			return []
+		return [entry for entry in self.entries() if version in entry.versions]
+
+	# Return all the records as NIDEntry, with their full list of versions
+	def entries(self):
+		versions = [[] for _ in self.records]
+		for (version, indices) in self.iterViews():
+			for idx in indices:
+				versions[idx].append(version)
+		return [self._entry(idx, versions[idx]) for idx in range(len(self.records))]
+
+	def write(self, outFile):
+		with _deltasOpen(outFile, 'wt') as f:
+			json.dump({"format": DELTAS_FORMAT_VERSION, "records": self.records, "base": self.base, "deltas": self.deltas}, f, separators=(',', ':'))
+
+	@classmethod
+	def load(cls, deltasFile):
+		with _deltasOpen(deltasFile, 'rt') as f:
+			data = json.load(f)
+		if data.get("format") != DELTAS_FORMAT_VERSION:
+			raise ValueError("{} has an unsupported delta format version: {}".format(deltasFile, data.get("format")))
+		deltas = [dict(delta, rename=[tuple(pair) for pair in delta["rename"]]) for delta in data["deltas"]]
+		return cls(data["records"], data["base"], deltas)
+
+def exportPSPLibdocDeltas(nidEntries, outFile):
+	PSPLibdocDeltas.fromEntries(nidEntries).write(outFile)
+
+def loadPSPLibdocDeltas(deltasFile):
+	return PSPLibdocDeltas.load(deltasFile).entries()
+
+SOURCE_LOADERS = {
+	'libdoc': loadPSPLibdoc,
+	'export': loadPSPExportFile,
+	'func': loadFunctionFile,
+	'ppsspp': loadHLEFunctionFile,
+	'packed': loadPackedLibdoc,
+	'deltas': loadPSPLibdocDeltas,
+}
+
+def _loadSource(source):
+	sourceType, path = source
+	return SOURCE_LOADERS[sourceType](path)
+
+def _initWorker():
+	# The SQLite connection must not be shared with the parent process, the cache is handled by the parent
+	global libdocCache
+	libdocCache = None
+
+# Map function over items, across a process pool if jobs != 1 (None for one process per CPU), keeping the order of the items
+def _mapJobs(function, items, jobs=1, chunksize=1):
+	if jobs == 1:
+		yield from map(function, items)
+		return
+
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_initWorker) as executor:
+		yield from executor.map(function, items, chunksize=chunksize)
+
+# Load a list of (sourceType, path) pairs, sourceType being a key of SOURCE_LOADERS
+# Yield the list of entries of each source, in the order of the sources. With jobs > 1 (or None for one job
+# per CPU), the files are parsed across a process pool, the result does not depend on the number of jobs
+def iterEach(sources, jobs=1):
+	sources = list(sources)
+	if jobs == 1 or len(sources) < 2:
+		yield from map(_loadSource, sources)
+		return
+
+	# Serve the libdoc files from the cache before dispatching the remaining ones to the workers
+	cached = [None] * len(sources)
+	if libdocCache is not None:
+		for (idx, (sourceType, path)) in enumerate(sources):
+			if sourceType == 'libdoc':
+				cached[idx] = libdocCache.load(path)
+
+	loaded = _mapJobs(_loadSource, [source for (source, entries) in zip(sources, cached) if entries is None], jobs, chunksize=4)
+	for ((sourceType, path), entries) in zip(sources, cached):
+		if entries is None:
+			entries = next(loaded)
+			if libdocCache is not None and sourceType == 'libdoc':
+				libdocCache.store(path, entries)
+		yield entries
+
+	# Let the process pool shut down
+	for _ in loaded:
+		pass
+
+# Load a list of (sourceType, path) pairs and return the list of entries of each source
+def loadEach(sources, jobs=1):
+	return list(iterEach(sources, jobs))
+
+# Load a list of (sourceType, path) pairs and return all their entries, in the order of the sources
+def loadMany(sources, jobs=1):
+	return [entry for entries in iterEach(sources, jobs) for entry in entries]
+
+# Load a list of (sourceType, path) pairs into a NIDStore, without keeping all the loaded entry lists in memory
+def loadStore(sources, jobs=1):
+	store = NIDStore()
+	for entries in iterEach(sources, jobs):
+		store.extend(entries)
+	return store
+
+PRX_FOLDERS = ("kd", "vsh/module")
+
+def _sourceType(path):
+	if path.endswith('.xml'):
+		return 'libdoc'
+	if path.endswith('.cpp'):
+		return 'ppsspp'
+	return 'export'
+
+# Return the (source, target) pairs of a batch update
+# The manifest is either a folder of export files named after the PRX they update (ata.exp updates ata.xml
+# and kermit_ata.xml in all the PRX folders of libdocRoot), or a text file with one "source target" pair per line
+def loadUpdateManifest(manifest, libdocRoot="PSPLibDoc"):
+	pairs = []
+	if os.path.isdir(manifest):
+		for export in sorted(os.listdir(manifest)):
+			module = export.removesuffix('.exp')
+			for prxFolder in PRX_FOLDERS:
+				for target in [module + '.xml', 'kermit_' + module + '.xml']:
+					targetPath = libdocRoot + '/' + prxFolder + '/' + target
+					if os.path.isfile(targetPath):
+						pairs.append((manifest + '/' + export, targetPath))
+	else:
+		with open(manifest) as f:
+			for line in f:
+				line = line.split('#')[0].strip()
+				if line:
+					source, target = line.split()
+					pairs.append((source, target))
+
+	return pairs
+
+def _updateTarget(args):
+	nidEntries, xmlFile, version = args
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		updatePSPLibdoc(nidEntries, xmlFile, version)
+	return output.getvalue()
+
+# Apply many sources to many PSP-Libdoc XML files in a single process
+# Each source is loaded once, then every target is updated with the entries of all its sources,
+# across a process pool if jobs != 1. The reports are printed in the order of the targets
+def updatePSPLibdocBatch(pairs, version=None, jobs=1):
+	sources = list(dict.fromkeys(source for (source, _) in pairs))
+	sourceEntries = dict(zip(sources, loadEach([(_sourceType(source), source) for source in sources], jobs)))
+
+	targets = {}
+	for (source, target) in pairs:
+		targets.setdefault(target, []).extend(sourceEntries[source])
+
+	updates = [(entries, target, version) for (target, entries) in targets.items()]
+	for (target, report) in zip(targets, _mapJobs(_updateTarget, updates, jobs)):
+		print("Updating PRX: {}".format(os.path.basename(target).removesuffix('.xml')))
+		print(report)
+
+# Maximum number of (libraryName, NID, version) keys memoized by a NIDResolver, the memo is cleared when it is full
+RESOLVE_CACHE_SIZE = 65536
+_UNRESOLVED = object()
+
+# Hash index of NID entries by (libraryName, NID) and by NID, to resolve many imports at once
+# A name which does not match the hash of its NID (randomized NIDs of later firmwares, unknown names) is only
+# valid in its own library: a NID unknown in its library is only resolved from another library if the name
+# found there matches the NID hash. Candidates are kept with the version bitmask of their entry
+class NIDResolver:
+	def __init__(self, nidEntries):
+		self.byLibraryNid = {}
+		self.byNid = {}
+		masks = {}
+		for entry in nidEntries:
+			nid = int(entry.nid, 16)
+			versions = tuple(entry.versions)
+			mask = masks.get(versions)
+			if mask is None:
+				mask = masks[versions] = registry.mask(versions)
+			candidate = (entry, mask, not entry.name.upper().endswith(entry.nid))
+			self.byLibraryNid.setdefault((entry.libraryName, nid), []).append(candidate)
+			if compute_nid_int(entry.name) == nid:
+				self.byNid.setdefault(nid, []).append(candidate)
+		# Entry resolving each (libraryName, NID, version) already asked for
+		self.resolved = {}
+
+	@staticmethod
+	def _score(candidate, bit):
+		# Prefer the entries of the requested version, then the known names
+		(entry, mask, known) = candidate
+		return (bit is None or (mask >> bit) & 1) * 2 + known
+
+	def _select(self, candidates, bit):
+		return max(candidates, key=lambda candidate: self._score(candidate, bit))
+
+	def resolveOne(self, libraryName, nid, version=None):
+		key = (libraryName, nid, version)
+		# Single lookup, the memo may be cleared by another thread at any time
+		entry = self.resolved.get(key, _UNRESOLVED)
+		if entry is not _UNRESOLVED:
+			return entry
+
+		# A version not registered is not in any entry
+		bit = None if version is None else registry.bits.get(version, -1)
+		if bit == -1:
+			bit = len(registry.versions)
+
+		candidates = self.byLibraryNid.get((libraryName, nid))
+		best = self._select(candidates, bit) if candidates else None
+		if best is None or self._score(best, bit) < 3:
+			matches = self.byNid.get(nid)
+			if matches:
+				match = self._select(matches, bit)
+				if best is None or self._score(match, bit) > self._score(best, bit):
+					best = match
+
+		entry = best[0] if best is not None else None
+		if len(self.resolved) >= RESOLVE_CACHE_SIZE:
+			self.resolved.clear()
+		self.resolved[key] = entry
+		return entry
+
+	# Return the entry resolving each (libraryName, NID) pair, NIDs being integers or hex strings, or None if there is none
+	def resolve(self, pairs, version=None):
+		resolveOne = self.resolveOne
+		return [resolveOne(libraryName, nid if isinstance(nid, int) else int(nid, 16), version) for (libraryName, nid) in pairs]
+
+def loadResolvePairs(pairsFile):
+	# One "libraryName NID" pair per line, e.g. an import list of a PRX
+	pairs = []
+	with open(pairsFile) as f:
+		for line in f:
+			line = line.split('#')[0].strip()
+			if line:
+				libraryName, nid = line.split()
+				pairs.append((libraryName, int(nid, 16)))
+	return pairs
+
+def printResolved(pairs, entries):
+	for ((libraryName, nid), entry) in zip(pairs, entries):
+		name = entry.name if entry is not None else libraryName + '_' + '%08X' % nid
+		print("{} 0x{:08X} {}".format(libraryName, nid, name))
+
 def exportNids(nidEntries, outFile):
 	with open(outFile, "w") as f:
 		for entry in nidEntries:
@@ -249,22 +909,36 @@ def exportKnownFunctionNames(nidEntries, outFile):
 			if not libDocNidNameUnk:
 				f.write(nidEntry.name + '\n')
 
-def exportPSPLibdocCombined(nidEntries, outFile, firmwareVersion=None, includeAll=False):
-	entries = sorted(nidEntries, key=lambda x: [x.prx, x.libraryName, x.versions[0], int(x.nid, 16)])
-	if firmwareVersion is not None:
-		entries = filter(lambda x : firmwareVersion in x.versions, entries)
-
-	root = ET.Element("PSPLIBDOC")
-	root.addprevious(ET.ProcessingInstruction('xml-stylesheet', 'type="text/xsl" href="psplibdocdisplay.xsl" '))
+def sortPSPLibdocEntries(nidEntries):
+	return sorted(nidEntries, key=lambda x: (x.prx, x.libraryName, versionKey(x.versions[0]), int(x.nid, 16)))
 
-	prxfiles = ET.SubElement(root, "PRXFILES")
+# Yield the entries (of the given firmware version) of a NIDStore or a list of NIDEntry in the order of sortPSPLibdocEntries
+# The files of a NIDStore are sorted separately and merged, a list is sorted as a whole
+def iterSortedEntries(nidEntries, firmwareVersion=None):
+	if isinstance(nidEntries, NIDStore):
+		return nidEntries.iterSorted(firmwareVersion)
+	if firmwareVersion is not None:
+		nidEntries = filterVersion(nidEntries, firmwareVersion)
+	return iter(sortPSPLibdocEntries(nidEntries))
 
+def exportPSPLibdocCombined(nidEntries, outFile, firmwareVersion=None, includeAll=False):
+	writePSPLibdocSorted(iterSortedEntries(nidEntries, firmwareVersion), outFile, includeAll)
+
+# Yield the PRXFILE element of each PRX of the sorted entries, one at a time
+# The functions of a library with the same name as the last library of the previous PRX are added to that
+# previous library, so a PRXFILE is only complete once the next PRX has started a library of its own
+def _prxFileElements(entries, includeAll=False):
+	prxfile = None
+	pending = []
 	lastPrxFile = ""
 	lastLibrary = ""
 
 	for entry in entries:
 		if lastPrxFile != entry.prx:
-			prxfile = ET.SubElement(prxfiles, "PRXFILE")
+			if prxfile is not None:
+				pending.append(prxfile)
+
+			prxfile = ET.Element("PRXFILE")
 
 			prx = ET.SubElement(prxfile, "PRX")
 			prx.text = entry.prx
@@ -277,6 +951,9 @@ def exportPSPLibdocCombined(nidEntries, outFile, firmwareVersion=None, includeAl
 			lastPrxFile = entry.prx
 
 		if lastLibrary != entry.libraryName:
+			yield from pending
+			pending = []
+
 			library = ET.SubElement(libraries, "LIBRARY")
 
 			name = ET.SubElement(library, "NAME")
@@ -306,7 +983,31 @@ def exportPSPLibdocCombined(nidEntries, outFile, firmwareVersion=None, includeAl
 			for v in entry.versions:
 				ET.SubElement(versions, "VERSION").text = v
 
-	ET.ElementTree(root).write(outFile, encoding='utf-8', method="xml", xml_declaration=True, pretty_print=True)
+	yield from pending
+	if prxfile is not None:
+		yield prxfile
+
+# Write a PSP-Libdoc XML file from entries already sorted by sortPSPLibdocEntries
+# The file is written one PRXFILE at a time, with the same layout as a pretty-printed tree
+def writePSPLibdocSorted(entries, outFile, includeAll=False):
+	with open(outFile, 'wb') as f:
+		f.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+		f.write(ET.tostring(ET.ProcessingInstruction('xml-stylesheet', 'type="text/xsl" href="psplibdocdisplay.xsl" ')) + b"\n")
+		with ET.xmlfile(f, encoding='UTF-8') as xf:
+			with xf.element("PSPLIBDOC"):
+				xf.write("\n  ")
+				prxfiles = _prxFileElements(entries, includeAll)
+				prxfile = next(prxfiles, None)
+				if prxfile is None:
+					xf.write(ET.Element("PRXFILES"))
+				else:
+					with xf.element("PRXFILES"):
+						for prxfile in itertools.chain([prxfile], prxfiles):
+							ET.indent(prxfile, space="  ", level=2)
+							xf.write("\n    ", prxfile)
+						xf.write("\n  ")
+				xf.write("\n")
+		f.write(b"\n")
 
 def exportPSPLibdocModules(nidEntries, outFolder):
 	os.makedirs(outFolder)
@@ -319,6 +1020,30 @@ def exportPSPLibdocModules(nidEntries, outFolder):
 		outfile = outFolder + "/" + key.split('.')[0] + ".xml"
 		exportPSPLibdocCombined(prxDict[key], outfile)
 
+def _writePSPLibdocVersion(args):
+	entries, outFile = args
+	print("Saving combined PSP-Libdoc file {}".format(outFile))
+	writePSPLibdocSorted(entries, outFile)
+
+# Write a combined PSP-Libdoc XML file for each firmware version found in the entries
+# The entries are sorted once and bucketed by version in a single pass, instead of being
+# sorted and filtered again for every firmware version
+def exportPSPLibdocAllVersions(nidEntries, outFolder, jobs=1):
+	byVersion = {}
+	# Most entries share the same version list, decode each distinct one only once
+	entryVersions = {}
+	for entry in iterSortedEntries(nidEntries):
+		key = tuple(entry.versions)
+		if key not in entryVersions:
+			entryVersions[key] = registry.versionsOf(registry.mask(key))
+		for version in entryVersions[key]:
+			byVersion.setdefault(version, []).append(entry)
+
+	os.makedirs(outFolder, exist_ok=True)
+	outputs = [(byVersion[version], outFolder + "/PSPLibDoc-" + version + ".xml") for version in sortVersions(byVersion)]
+	for _ in _mapJobs(_writePSPLibdocVersion, outputs, jobs):
+		pass
+
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser()
 
@@ -346,11 +1071,39 @@ if __name__ == '__main__':
 						type=str,
 						help='Load ppsspp source file (HLEFunction arrays)')
 
+	parser.add_argument('-x', '--packed',
+						required=False,
+						nargs='+',
+						type=str,
+						help='Load a packed PSP-Libdoc file (written by --writePacked).')
+
+	parser.add_argument('-y', '--deltas',
+						required=False,
+						nargs='+',
+						type=str,
+						help='Load a delta file of firmware views (written by --writeDeltas).')
+
 	parser.add_argument('-u', '--updateLibdoc',
 						required=False,
 						type=str,
 						help='Update specified PSP-Libdoc XML file with loaded NID names.')
 
+	parser.add_argument('-b', '--updateBatch',
+						required=False,
+						type=str,
+						help='Update many PSP-Libdoc XML files at once, from a folder of export files named after their PRX or from a manifest of "source target" lines.')
+
+	parser.add_argument('-r', '--libdocRoot',
+						required=False,
+						type=str,
+						default="PSPLibDoc",
+						help='Root folder of the PSP-Libdoc XML files updated from an export folder by --updateBatch.')
+
+	parser.add_argument('--resolve',
+						required=False,
+						type=str,
+						help='Print the name of each "libraryName NID" pair of the specified file, from the loaded entries of the firmware version given by -v if possible.')
+
 	parser.add_argument('-n', '--exportNids',
 						required=False,
 						type=str,
@@ -381,37 +1134,81 @@ if __name__ == '__main__':
 						type=str,
 						help='Write PSP-Libdoc XML file for each loaded PRX module to the specified folder.')
 
+	parser.add_argument('-w', '--writePacked',
+						required=False,
+						type=str,
+						help='Write all loaded entries with all their versions to the specified packed file (gzip compressed if it ends with .gz, zstd compressed if it ends with .zst).')
+
+	parser.add_argument('-m', '--writeLookup',
+						required=False,
+						type=str,
+						help='Write a memory-mappable NID lookup file (read by psp_nid_lookup.py) of all loaded entries to the specified file.')
+
+	parser.add_argument('-t', '--writeDeltas',
+						required=False,
+						type=str,
+						help='Write the firmware views of all loaded entries as a base version and per-version deltas to the specified file (gzip compressed if it ends with .gz).')
+
+	parser.add_argument('-a', '--allVersions',
+						required=False,
+						type=str,
+						help='Write a combined PSP-Libdoc XML file for each firmware version to the specified folder.')
+
 	parser.add_argument('-v', '--firmwareVersion',
 						required=False,
 						type=str,
 						help='Extract only the NIDs from a given firmware version')
 
-	nidEntries = []
+	parser.add_argument('-j', '--jobs',
+						required=False,
+						type=int,
+						default=1,
+						help='Number of processes used to load the source files (0 for one per CPU).')
+
+	parser.add_argument('--cache',
+						required=False,
+						nargs='?',
+						const=DEFAULT_CACHE_FILE,
+						type=str,
+						help='Serve unchanged PSP-Libdoc XML files from the specified cache file (default: {}).'.format(DEFAULT_CACHE_FILE))
+
+	parser.add_argument('--serve',
+						required=False,
+						nargs='?',
+						const="127.0.0.1:8086",
+						type=str,
+						help='Answer NID/name/library queries over HTTP on the specified "host:port" or "unix:path" address (default: 127.0.0.1:8086), reloading the loaded files when they change.')
+
 	args = parser.parse_args(sys.argv[1:])
 
-	if(args.libdoc):
-		for libdoc in args.libdoc:
-			libdocEntries = loadPSPLibdoc(libdoc)
-			nidEntries.extend(libdocEntries)
+	if(args.cache):
+		enableCache(args.cache)
 
-	if(args.export):
-		for export in args.export:
-			exportEntries = loadPSPExportFile(export)
-			nidEntries.extend(exportEntries)
+	sources = []
+	for (sourceType, paths) in [('libdoc', args.libdoc), ('export', args.export), ('func', args.func), ('ppsspp', args.ppsspp), ('packed', args.packed), ('deltas', args.deltas)]:
+		if(paths):
+			sources.extend((sourceType, path) for path in paths)
 
-	if(args.func):
-		for func in args.func:
-			funcEntries = loadFunctionFile(func)
-			nidEntries.extend(funcEntries)
+	if(args.serve):
+		# The server module imports psp_libdoc, whose cache is not the one of this script
+		import psp_libdoc_server
+		if(args.cache):
+			psp_libdoc_server.psp_libdoc.enableCache(args.cache)
+		psp_libdoc_server.serve(sources, args.serve, args.jobs or None)
+		sys.exit(0)
 
-	if(args.ppsspp):
-		for ppsspp in args.ppsspp:
-			ppssppEntries = loadHLEFunctionFile(ppsspp)
-			nidEntries.extend(ppssppEntries)
+	nidEntries = loadStore(sources, args.jobs or None)
 
 	if(args.updateLibdoc):
 		updatePSPLibdoc(nidEntries, args.updateLibdoc, args.firmwareVersion)
 
+	if(args.updateBatch):
+		updatePSPLibdocBatch(loadUpdateManifest(args.updateBatch, args.libdocRoot), args.firmwareVersion, args.jobs or None)
+
+	if(args.resolve):
+		pairs = loadResolvePairs(args.resolve)
+		printResolved(pairs, NIDResolver(nidEntries).resolve(pairs, args.firmwareVersion))
+
 	if(args.exportNids):
 		exportNids(nidEntries, args.exportNids)
 
@@ -427,6 +1224,18 @@ if __name__ == '__main__':
 	if(args.writeLibdocCombined):
 		exportPSPLibdocCombined(nidEntries, args.writeLibdocCombined, args.firmwareVersion)
 
+	if(args.writePacked):
+		writePackedLibdoc(nidEntries, args.writePacked)
+
+	if(args.writeLookup):
+		writeLookupFile(nidEntries, args.writeLookup)
+
+	if(args.writeDeltas):
+		exportPSPLibdocDeltas(nidEntries, args.writeDeltas)
+
+	if(args.allVersions):
+		exportPSPLibdocAllVersions(nidEntries, args.allVersions, args.jobs or None)
+
 	if(args.writeLibdocSplit):
 		exportPSPLibdocModules(nidEntries, args.writeLibdocSplit)
 
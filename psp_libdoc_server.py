@@ -0,0 +1,243 @@
+# Local HTTP/JSON query server over NID entries loaded once in memory, started by psp_libdoc.py --serve
+#
+# Endpoints (all answers are JSON, entries are NIDEntry fields plus "versionRanges", their versions range-compressed
+# e.g. "1.00-3.73, vita-0.931-vita-3.73"; "version" optionally restricts the answer to a firmware version):
+#   GET  /nid/<nid>?version=V           entries with this NID (0x prefix and case do not matter)
+#   GET  /name/<name>?version=V         entries with this name
+#   GET  /library/<library>?version=V   entries of this library
+#   GET  /libraries, /versions          all the library names, all the firmware versions
+#   POST /nid, /name, /library          batch queries: the body is a JSON list of keys, the answer a {key: [entries]} object
+#   POST /resolve                       resolve a JSON list of [libraryName, nid] pairs (see psp_libdoc.NIDResolver), the answer
+#                                       is the list of the entries found (null if none)
+#   POST /reload                        check the loaded files for changes now
+
+import functools
+import http.server
+import json
+import os
+import psp_libdoc
+import socketserver
+import sys
+import threading
+import urllib.parse
+
+from psp_firmware import registry, sortVersions
+
+DEFAULT_ADDRESS = "127.0.0.1:8086"
+
+# Interval between two checks of the modification times of the loaded files
+POLL_INTERVAL = 2.0
+
+def normalizeNid(nid):
+	return nid.upper().removeprefix('0X')
+
+@functools.lru_cache(maxsize=4096)
+def formatVersionRanges(versions):
+	return registry.formatRanges(registry.mask(versions))
+
+def entryJson(entry):
+	value = entry._asdict()
+	value["versionRanges"] = formatVersionRanges(tuple(entry.versions))
+	return value
+
+# Entries of a list of (sourceType, path) sources, indexed by NID, name and library
+# reload() parses again the sources whose mtime or size changed and swaps in new indexes, so that queries
+# running at the same time keep using a consistent set of indexes
+class NIDCorpus:
+	def __init__(self, sources, jobs=1):
+		self.sources = list(dict.fromkeys(sources))
+		self.jobs = jobs
+		self.stats = {}
+		self.entries = {}
+		self.indexes = ({}, {}, {})
+		self.resolver = psp_libdoc.NIDResolver([])
+		self.versions = []
+		self.lock = threading.Lock()
+		self.reload()
+
+	@staticmethod
+	def fileStat(path):
+		try:
+			stat = os.stat(path)
+		except FileNotFoundError:
+			return None
+		return (stat.st_mtime_ns, stat.st_size)
+
+	# Load the new and changed sources, return the number of sources loaded
+	# A source which fails to load keeps its previous entries and is tried again on the next call
+	def reload(self):
+		with self.lock:
+			stats = dict((source, self.fileStat(source[1])) for source in self.sources)
+			changed = [source for source in self.sources if stats[source] is not None and stats[source] != self.stats.get(source)]
+			for source in self.sources:
+				if stats[source] is None and source in self.entries:
+					print("Source removed: '{}'".format(source[1]), file=sys.stderr)
+					del self.entries[source]
+
+			loaded = 0
+			if changed or len(self.entries) != len(self.stats):
+				for (source, entries) in self.loadSources(changed):
+					if entries is None:
+						# Keep the previous entries and stat of the source, so that it is loaded again on the next poll
+						stats[source] = self.stats.get(source)
+						continue
+					self.entries[source] = entries
+					loaded += 1
+				self.stats = dict((source, stat) for (source, stat) in stats.items() if stat is not None)
+				self.buildIndexes()
+			return loaded
+
+	# Yield (source, entries) for each source, entries being None if the source could not be loaded (e.g. a file being saved)
+	def loadSources(self, sources):
+		for source in sources:
+			print("Loading NID entries from '{}' ...".format(source[1]), file=sys.stderr)
+		try:
+			yield from zip(sources, psp_libdoc.loadEach(sources, self.jobs))
+			return
+		except Exception:
+			pass
+
+		# Load the sources one by one to find the ones which fail
+		for source in sources:
+			try:
+				yield (source, psp_libdoc.loadEach([source])[0])
+			except Exception as e:
+				print("Failed to load '{}', keeping its previous entries: {}".format(source[1], e), file=sys.stderr)
+				yield (source, None)
+
+	def buildIndexes(self):
+		byNid = {}
+		byName = {}
+		byLibrary = {}
+		versions = set()
+		for source in self.sources:
+			for entry in self.entries.get(source, ()):
+				byNid.setdefault(entry.nid, []).append(entry)
+				byName.setdefault(entry.name, []).append(entry)
+				byLibrary.setdefault(entry.libraryName, []).append(entry)
+				versions.update(entry.versions)
+		self.indexes = (byNid, byName, byLibrary)
+		self.resolver = psp_libdoc.NIDResolver(entry for entries in byLibrary.values() for entry in entries)
+		self.versions = sortVersions(versions)
+
+	def query(self, field, key, version=None):
+		index = self.indexes[("nid", "name", "library").index(field)]
+		entries = index.get(normalizeNid(key) if field == "nid" else key, [])
+		if version is not None:
+			entries = [entry for entry in entries if version in entry.versions]
+		return [entryJson(entry) for entry in entries]
+
+	def resolve(self, pairs, version=None):
+		return [entryJson(entry) if entry is not None else None for entry in self.resolver.resolve(pairs, version)]
+
+	def libraries(self):
+		return sorted(self.indexes[2])
+
+class NIDRequestHandler(http.server.BaseHTTPRequestHandler):
+	corpus = None
+	# Keep the connections of the clients alive between queries, answers are sent without delay
+	protocol_version = "HTTP/1.1"
+	disable_nagle_algorithm = True
+
+	def address_string(self):
+		# Unix socket clients have no address
+		return self.client_address[0] if self.client_address else "unix"
+
+	def sendJson(self, value, status=200):
+		data = json.dumps(value).encode('utf-8')
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def parsePath(self):
+		url = urllib.parse.urlsplit(self.path)
+		version = urllib.parse.parse_qs(url.query).get("version", [None])[0]
+		parts = [urllib.parse.unquote(part) for part in url.path.strip('/').split('/', 1)]
+		return (parts, version)
+
+	def do_GET(self):
+		(parts, version) = self.parsePath()
+		if len(parts) == 2 and parts[0] in ("nid", "name", "library"):
+			self.sendJson(self.corpus.query(parts[0], parts[1], version))
+		elif parts == ["libraries"]:
+			self.sendJson(self.corpus.libraries())
+		elif parts == ["versions"]:
+			self.sendJson(self.corpus.versions)
+		else:
+			self.sendJson({"error": "unknown endpoint"}, 404)
+
+	def do_POST(self):
+		(parts, version) = self.parsePath()
+		body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+		if parts == ["reload"]:
+			try:
+				self.sendJson({"reloaded": self.corpus.reload()})
+			except Exception as e:
+				self.sendJson({"error": str(e)}, 500)
+		elif len(parts) == 1 and parts[0] in ("nid", "name", "library", "resolve"):
+			try:
+				keys = json.loads(body)
+			except ValueError:
+				keys = None
+			if parts[0] == "resolve":
+				try:
+					if not isinstance(keys, list) or not all(isinstance(key, list) and all(isinstance(k, str) for k in key) for key in keys):
+						raise TypeError()
+					pairs = [(libraryName, int(normalizeNid(nid), 16)) for (libraryName, nid) in keys]
+				except (TypeError, ValueError):
+					self.sendJson({"error": "the body must be a JSON list of [libraryName, nid] pairs"}, 400)
+					return
+				self.sendJson(self.corpus.resolve(pairs, version))
+				return
+			if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+				self.sendJson({"error": "the body must be a JSON list"}, 400)
+				return
+			self.sendJson(dict((key, self.corpus.query(parts[0], key, version)) for key in keys))
+		else:
+			self.sendJson({"error": "unknown endpoint"}, 404)
+
+	def log_message(self, format, *args):
+		pass
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+	def server_bind(self):
+		if os.path.exists(self.server_address):
+			os.unlink(self.server_address)
+		socketserver.UnixStreamServer.server_bind(self)
+
+# Create the server of a "host:port" or "unix:path" address
+def makeServer(address, corpus):
+	handler = type("CorpusRequestHandler", (NIDRequestHandler,), {"corpus": corpus})
+	if address.startswith("unix:"):
+		# TCP options do not apply to Unix sockets
+		handler.disable_nagle_algorithm = False
+		return ThreadingUnixHTTPServer(address.removeprefix("unix:"), handler)
+	host, port = address.rsplit(':', 1)
+	return http.server.ThreadingHTTPServer((host, int(port)), handler)
+
+def _pollSources(corpus, stopped, interval):
+	while not stopped.wait(interval):
+		try:
+			corpus.reload()
+		except Exception as e:
+			print("Failed to reload the sources: {}".format(e), file=sys.stderr)
+
+def serve(sources, address=DEFAULT_ADDRESS, jobs=1, pollInterval=POLL_INTERVAL):
+	corpus = NIDCorpus(sources, jobs)
+	server = makeServer(address, corpus)
+	stopped = threading.Event()
+	poller = threading.Thread(target=_pollSources, args=(corpus, stopped, pollInterval), daemon=True)
+	poller.start()
+
+	print("Serving {} NID entries on {}".format(sum(len(entries) for entries in corpus.entries.values()), address), file=sys.stderr)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		stopped.set()
+		server.server_close()
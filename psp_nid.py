@@ -0,0 +1,39 @@
+# NID hashing: a NID is the first 4 bytes of the SHA-1 hash of a name, read as a little-endian 32-bit integer
+
+import concurrent.futures
+import functools
+import hashlib
+import os
+
+# Batches smaller than this are hashed in the current process, spawning workers would cost more than hashing
+PARALLEL_BATCH_SIZE = 200000
+
+@functools.lru_cache(maxsize=1 << 18)
+def compute_nid_int(name):
+	return int.from_bytes(hashlib.sha1(name.encode('utf-8')).digest()[:4], 'little')
+
+@functools.lru_cache(maxsize=1 << 18)
+def compute_nid(name):
+	return '%08X' % compute_nid_int(name)
+
+def _computeNidChunk(args):
+	names, asInt = args
+	sha1 = hashlib.sha1
+	if asInt:
+		return [int.from_bytes(sha1(name.encode('utf-8')).digest()[:4], 'little') for name in names]
+	return ['%08X' % int.from_bytes(sha1(name.encode('utf-8')).digest()[:4], 'little') for name in names]
+
+def compute_nids(names, asInt=False, jobs=1, chunkSize=50000):
+	"""Hash an iterable of names, returning the list of their NIDs in the same order.
+
+	NIDs are returned as upper-case hex strings (as in NIDEntry.nid), or as integers if asInt is set.
+	Batches of at least PARALLEL_BATCH_SIZE names are hashed across a process pool if jobs != 1
+	(None for one process per CPU). Unlike compute_nid, batch results are not memoized.
+	"""
+	names = list(names)
+	if jobs == 1 or len(names) < PARALLEL_BATCH_SIZE or (jobs is None and os.cpu_count() == 1):
+		return _computeNidChunk((names, asInt))
+
+	chunks = [(names[i:i + chunkSize], asInt) for i in range(0, len(names), chunkSize)]
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+		return [nid for nids in executor.map(_computeNidChunk, chunks) for nid in nids]
@@ -0,0 +1,178 @@
+#! /usr/bin/env python3
+
+# Memory-mappable NID lookup file: NID -> name for a library at a firmware version, without parsing anything at load time
+# Usage example: ./psp_nid_lookup.py PSPLibDoc.nids SysMemForKernel 0x237DBD4F -v 6.61
+#
+# Layout (little-endian), every section offset follows from the header counts:
+#   header     magic, format version, number of versions, bytes per version bitmask, number of bitmasks, of libraries, of records
+#   versions   (offset, length) of each firmware version name in the string blob, in canonical order
+#   libraries  (name offset, name length, first record, number of records), sorted by UTF-8 name
+#   nids       uint32 NID of each record, sorted within each library
+#   records    (name offset, name length, bitmask index) of each record, in the same order as the NIDs
+#   bitmasks   version bitsets, bit i standing for the i-th version of the versions table
+#   strings    UTF-8 blob of all the names
+
+import argparse
+import mmap
+import struct
+import sys
+
+from psp_firmware import sortVersions
+
+LOOKUP_MAGIC = b'PSPLNID\0'
+LOOKUP_FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sIIIIII')
+STRING_REF = struct.Struct('<II')
+LIBRARY = struct.Struct('<IIII')
+NID = struct.Struct('<I')
+RECORD = struct.Struct('<III')
+
+def writeLookupFile(nidEntries, outFile):
+	"""Write the NID lookup file of a list of NIDEntry.
+
+	Entries of the same library with the same NID and name (e.g. from several PRX) are merged into one record
+	holding the union of their versions. Records of the same NID are sorted known names first.
+	"""
+	libraries = {}
+	allVersions = set()
+	for entry in nidEntries:
+		versions = libraries.setdefault(entry.libraryName, {}).setdefault((int(entry.nid, 16), entry.name), set())
+		versions.update(entry.versions)
+		allVersions.update(entry.versions)
+
+	versions = sortVersions(allVersions)
+	versionPos = dict((v, pos) for (pos, v) in enumerate(versions))
+	maskSize = (len(versions) + 7) // 8
+
+	strings = bytearray()
+	stringRefs = {}
+	def stringRef(string):
+		if string not in stringRefs:
+			data = string.encode('utf-8')
+			stringRefs[string] = (len(strings), len(data))
+			strings.extend(data)
+		return stringRefs[string]
+
+	masks = {}
+	libraryTable = []
+	nids = []
+	records = []
+	for libraryName in sorted(libraries, key=lambda name: name.encode('utf-8')):
+		libraryRecords = sorted(libraries[libraryName].items(),
+								key=lambda item: (item[0][0], item[0][1].upper().endswith('%08X' % item[0][0]), item[0][1]))
+		libraryTable.append(stringRef(libraryName) + (len(nids), len(libraryRecords)))
+		for ((nid, name), recordVersions) in libraryRecords:
+			mask = sum(1 << versionPos[v] for v in recordVersions).to_bytes(maskSize, 'little')
+			nids.append(nid)
+			records.append(stringRef(name) + (masks.setdefault(mask, len(masks)),))
+
+	versionRefs = [stringRef(v) for v in versions]
+	with open(outFile, 'wb') as f:
+		f.write(HEADER.pack(LOOKUP_MAGIC, LOOKUP_FORMAT_VERSION, len(versions), maskSize, len(masks), len(libraryTable), len(nids)))
+		f.write(b''.join(STRING_REF.pack(*ref) for ref in versionRefs))
+		f.write(b''.join(LIBRARY.pack(*library) for library in libraryTable))
+		f.write(b''.join(NID.pack(nid) for nid in nids))
+		f.write(b''.join(RECORD.pack(*record) for record in records))
+		f.write(b''.join(masks))
+		f.write(strings)
+
+class NIDLookup:
+	"""Reader of a NID lookup file, memory-mapped and searched in place.
+
+	Opening a file only reads its header and its versions table, each lookup is a binary search over the
+	library table followed by a binary search over the NIDs of the library.
+	"""
+	def __init__(self, lookupFile):
+		with open(lookupFile, 'rb') as f:
+			self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic, formatVersion, numVersions, self.maskSize, numMasks, self.numLibraries, numRecords = HEADER.unpack_from(self.data, 0)
+		if magic != LOOKUP_MAGIC:
+			raise ValueError("{} is not a NID lookup file".format(lookupFile))
+		if formatVersion != LOOKUP_FORMAT_VERSION:
+			raise ValueError("{} has an unsupported lookup format version: {}".format(lookupFile, formatVersion))
+
+		self.versionsOffset = HEADER.size
+		self.librariesOffset = self.versionsOffset + numVersions * STRING_REF.size
+		self.nidsOffset = self.librariesOffset + self.numLibraries * LIBRARY.size
+		self.recordsOffset = self.nidsOffset + numRecords * NID.size
+		self.masksOffset = self.recordsOffset + numRecords * RECORD.size
+		self.stringsOffset = self.masksOffset + numMasks * self.maskSize
+
+		self.versions = [self._string(*STRING_REF.unpack_from(self.data, self.versionsOffset + i * STRING_REF.size)) for i in range(numVersions)]
+		self.versionPos = dict((v, pos) for (pos, v) in enumerate(self.versions))
+
+	def _bytes(self, offset, length):
+		start = self.stringsOffset + offset
+		return self.data[start:start + length]
+
+	def _string(self, offset, length):
+		return self._bytes(offset, length).decode('utf-8')
+
+	def _findLibrary(self, libraryName):
+		name = libraryName.encode('utf-8')
+		low, high = 0, self.numLibraries
+		while low < high:
+			mid = (low + high) // 2
+			nameOffset, nameLength, first, count = LIBRARY.unpack_from(self.data, self.librariesOffset + mid * LIBRARY.size)
+			midName = self._bytes(nameOffset, nameLength)
+			if midName == name:
+				return (first, count)
+			if midName < name:
+				low = mid + 1
+			else:
+				high = mid
+		return None
+
+	def _hasVersion(self, maskIdx, pos):
+		return self.data[self.masksOffset + maskIdx * self.maskSize + pos // 8] >> (pos % 8) & 1 == 1
+
+	def lookup(self, libraryName, nid, version=None):
+		"""Return the name of a NID (integer or hex string) in a library, existing in the given firmware version if any, or None."""
+		if isinstance(nid, str):
+			nid = int(nid, 16)
+		library = self._findLibrary(libraryName)
+		pos = self.versionPos.get(version)
+		if library is None or (version is not None and pos is None):
+			return None
+
+		# Lower bound of the NID in the records of the library
+		(low, high) = library[0], library[0] + library[1]
+		end = high
+		while low < high:
+			mid = (low + high) // 2
+			if NID.unpack_from(self.data, self.nidsOffset + mid * NID.size)[0] < nid:
+				low = mid + 1
+			else:
+				high = mid
+
+		for idx in range(low, end):
+			if NID.unpack_from(self.data, self.nidsOffset + idx * NID.size)[0] != nid:
+				break
+			nameOffset, nameLength, maskIdx = RECORD.unpack_from(self.data, self.recordsOffset + idx * RECORD.size)
+			if pos is None or self._hasVersion(maskIdx, pos):
+				return self._string(nameOffset, nameLength)
+		return None
+
+	def close(self):
+		self.data.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('lookupFile', type=str, help='NID lookup file (written by psp_libdoc.py --writeLookup)')
+	parser.add_argument('library', type=str, help='Library name')
+	parser.add_argument('nids', nargs='+', type=str, help='NIDs to look up')
+	parser.add_argument('-v', '--firmwareVersion', required=False, type=str, help='Only give names existing in this firmware version')
+	args = parser.parse_args(sys.argv[1:])
+
+	with NIDLookup(args.lookupFile) as lookup:
+		for nid in args.nids:
+			name = lookup.lookup(args.library, nid, args.firmwareVersion)
+			print("0x{:08X} --> {}".format(int(nid, 16), name if name is not None else "(not found)"))
@@ -0,0 +1,188 @@
+#! /usr/bin/env python3
+
+# Search names for unknown NIDs by hashing prefix + word(s) + suffix candidates
+# Usage example: ./psp_nid_search.py -l PSPLibDoc/kd/sysmem.xml -w words.txt -s "" Addr Size -x found.xml
+
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import psp_libdoc
+import re
+import sys
+import time
+
+from xml.sax.saxutils import escape
+
+# {prefix: set of the unknown NIDs (as integers) searched with it} of the current process
+searchedNids = {}
+
+def _initSearchWorker(nids):
+	global searchedNids
+	searchedNids = nids
+
+def loadUnknownNids(nidFile):
+	# Same format as the output of psp_libdoc.py -o: one 0x-prefixed NID per line
+	with open(nidFile) as f:
+		return set(int(line.strip(), 16) for line in f if line.strip())
+
+# Return the {libraryName: set of unknown NIDs} of a list of NIDEntry
+def unknownNidsFromEntries(nidEntries):
+	unknownNids = {}
+	for entry in nidEntries:
+		if entry.name.upper().endswith(entry.nid):
+			unknownNids.setdefault(entry.libraryName, set()).add(int(entry.nid, 16))
+	return unknownNids
+
+# Guess the {libraryName: [prefixes]} from the known names of each library, e.g. sceKernelAllocPartitionMemory -> sceKernel
+def libraryPrefixes(nidEntries):
+	prefixRegex = re.compile(r'^(sce[A-Z][a-z0-9]*|[a-z]+[A-Z][a-z0-9]*)')
+	prefixes = {}
+	for entry in nidEntries:
+		if not entry.name.upper().endswith(entry.nid):
+			match = prefixRegex.match(entry.name)
+			if match:
+				prefixes.setdefault(entry.libraryName, {})[match.group(1)] = True
+	return dict((libraryName, list(libraryPrefixes)) for (libraryName, libraryPrefixes) in prefixes.items())
+
+def positiveInt(value):
+	number = int(value)
+	if number < 1:
+		raise argparse.ArgumentTypeError("must be at least 1, got {}".format(value))
+	return number
+
+def loadWords(wordFile):
+	with open(wordFile) as f:
+		return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+def _searchChunk(args):
+	prefix, firstWords, words, suffixes, depth = args
+	sha1 = hashlib.sha1
+	nids = searchedNids[prefix]
+	hits = []
+	count = 0
+	for firstWord in firstWords:
+		for others in itertools.product(words, repeat=depth - 1):
+			stem = prefix + firstWord + ''.join(others)
+			for suffix in suffixes:
+				name = stem + suffix
+				if int.from_bytes(sha1(name.encode('utf-8')).digest()[:4], 'little') in nids:
+					hits.append(name)
+			count += len(suffixes)
+	return (hits, count)
+
+# Hash all the prefix + word^depth + suffix candidates and return a {NID: [names]} dict of the unknown NIDs found
+# unknownNids and prefixes are {libraryName: ...} dicts, the unknown NIDs of a library are only searched with the
+# prefixes of that library. The candidates are split by prefix and chunks of the first word across a process pool
+# (None for one process per CPU). Progress and throughput are reported to the "progress" stream if it is not None
+def searchNids(unknownNids, prefixes, words, suffixes=('',), depth=1, jobs=None, chunkSize=256, progress=sys.stderr):
+	prefixNids = {}
+	for (libraryName, nids) in unknownNids.items():
+		for prefix in prefixes.get(libraryName, ()):
+			prefixNids.setdefault(prefix, set()).update(nids)
+	prefixNids = dict((prefix, frozenset(nids)) for (prefix, nids) in prefixNids.items())
+
+	suffixes = list(suffixes)
+	total = len(prefixNids) * len(words) ** depth * len(suffixes)
+	tasks = [(prefix, words[i:i + chunkSize], words, suffixes, depth) for prefix in prefixNids for i in range(0, len(words), chunkSize)]
+
+	found = {}
+	done = 0
+	start = time.monotonic()
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_initSearchWorker, initargs=(prefixNids,)) as executor:
+		for (hits, count) in executor.map(_searchChunk, tasks):
+			for name in hits:
+				found.setdefault(psp_libdoc.compute_nid(name), []).append(name)
+			done += count
+			if progress is not None:
+				elapsed = max(time.monotonic() - start, 1e-9)
+				print("\r{}/{} candidates ({:.1f}%), {:.0f} hashes/s, {} NIDs found".format(
+					done, total, done / total * 100, done / elapsed, len(found)), end='', file=progress)
+	if progress is not None:
+		print(file=progress)
+
+	return found
+
+def exportFoundNames(found, outFile):
+	# Same format as the function files loaded by psp_libdoc.py -f
+	with open(outFile, "w") as f:
+		for nid in sorted(found):
+			for name in found[nid]:
+				f.write("<FUNC><NID>0x{}</NID><NAME>{}</NAME></FUNC>\n".format(nid, escape(name)))
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+
+	parser.add_argument('-l', '--libdoc',
+						required=False,
+						nargs='+',
+						type=str,
+						help='Search the unknown NIDs of the specified PSP-Libdoc XML files, also used to guess the prefixes.')
+
+	parser.add_argument('-u', '--unknownNids',
+						required=False,
+						type=str,
+						help='Search the NIDs listed in the specified file (as written by psp_libdoc.py -o).')
+
+	parser.add_argument('-w', '--words',
+						required=True,
+						type=str,
+						help='Word list file, one word per line.')
+
+	parser.add_argument('-p', '--prefixes',
+						required=False,
+						nargs='+',
+						type=str,
+						help='Name prefixes of all the searched NIDs (default: guessed from the known names of each library of the loaded PSP-Libdoc files).')
+
+	parser.add_argument('-s', '--suffixes',
+						required=False,
+						nargs='+',
+						type=str,
+						default=[''],
+						help='Name suffixes (default: no suffix).')
+
+	parser.add_argument('-n', '--depth',
+						required=False,
+						type=positiveInt,
+						default=1,
+						help='Number of words combined in each candidate.')
+
+	parser.add_argument('-j', '--jobs',
+						required=False,
+						type=int,
+						default=0,
+						help='Number of processes hashing the candidates (0 for one per CPU).')
+
+	parser.add_argument('-x', '--exportFound',
+						required=True,
+						type=str,
+						help='Write the found names to the specified function file (loadable with psp_libdoc.py -f).')
+
+	args = parser.parse_args(sys.argv[1:])
+
+	nidEntries = psp_libdoc.loadMany([('libdoc', libdoc) for libdoc in (args.libdoc or [])])
+	unknownNids = unknownNidsFromEntries(nidEntries)
+	# NIDs listed in a file have no library, they are searched with the prefixes of all the libraries
+	if(args.unknownNids):
+		unknownNids[None] = loadUnknownNids(args.unknownNids)
+
+	if(args.prefixes):
+		prefixes = dict((libraryName, args.prefixes) for libraryName in unknownNids)
+	else:
+		prefixes = libraryPrefixes(nidEntries)
+		allPrefixes = list(dict.fromkeys(prefix for libraryPrefixes in prefixes.values() for prefix in libraryPrefixes))
+		# Libraries without any known name are also searched with the prefixes of all the libraries
+		for libraryName in unknownNids:
+			if libraryName not in prefixes:
+				prefixes[libraryName] = allPrefixes
+
+	words = loadWords(args.words)
+	print("Searching {} unknown NIDs of {} libraries with {} prefixes, {} words and {} suffixes".format(
+		sum(len(nids) for nids in unknownNids.values()), len(unknownNids),
+		len(set(prefix for libraryName in unknownNids for prefix in prefixes[libraryName])), len(words), len(args.suffixes)))
+
+	found = searchNids(unknownNids, prefixes, words, args.suffixes, args.depth, args.jobs or None)
+	for nid in sorted(found):
+		print("0x{} --> {}".format(nid, ", ".join(found[nid])))
+	exportFoundNames(found, args.exportFound)
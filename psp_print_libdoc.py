@@ -2,56 +2,92 @@
 
 import argparse
 import os
+import psp_libdoc
+import sqlite3
 import sys
 
 from collections import defaultdict
-from lxml import etree as ET
 
 prxFolders = ("kd", "vsh/module")
 
-def loadPSPLibdoc(xmlFile, targetLibrary):
-	tree = ET.parse(xmlFile)
-	root = tree.getroot()
-
-	nidEntries = defaultdict(set)
-	for prx in root.findall("PRXFILES/PRXFILE"):
-		prxFile = prx.find("PRX").text
-		for library in prx.findall("LIBRARIES/LIBRARY"):
-			libraryName = library.find("NAME").text
-			if (libraryName == targetLibrary) or (not targetLibrary):
-				for function in library.findall("FUNCTIONS/FUNCTION"):
-					functionNID = function.find("NID").text.upper().removeprefix('0X')
-					functionName = function.find("NAME").text
-					nidEntries[prxFile].add( (libraryName, functionNID, functionName) )
-
-	for prx in nidEntries.keys():
-		nidEntries[prx] = sorted(nidEntries[prx], key = lambda x: (x[0], x[1]))
-
-	return nidEntries
-
-def loadPrxModule(directory, module, library):
-	nidEntries = {}
-	for prxFolder in prxFolders:
-		filePath = directory + '/' + prxFolder + '/' + module + '.xml'
-		if os.path.isfile(filePath):
-			print("Loading NID entries from '{}' ...".format(filePath))
-			nidEntries.update(loadPSPLibdoc(filePath, library))
-
-	return nidEntries
+# Index of the PSP-Libdoc XML files of a directory, stored in that directory
+INDEX_FILE = ".psp_libdoc_index.sqlite"
+
+# SQLite index of the exports of all the PRX modules of a PSP-Libdoc directory
+# The files whose mtime or size changed since they were indexed are indexed again when the index is opened,
+# after which all the queries are point lookups
+class LibdocIndex:
+	def __init__(self, directory):
+		self.directory = directory
+		self.connection = sqlite3.connect(os.path.join(directory, INDEX_FILE), timeout=60)
+		self.connection.executescript("""
+			CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, seq INTEGER);
+			CREATE TABLE IF NOT EXISTS exports (path TEXT, module TEXT, prx TEXT, library TEXT, nid TEXT, name TEXT);
+			DROP TABLE IF EXISTS imports;
+			CREATE INDEX IF NOT EXISTS exports_path ON exports (path);
+			CREATE INDEX IF NOT EXISTS exports_module ON exports (module);
+			CREATE INDEX IF NOT EXISTS exports_library ON exports (library);
+			CREATE INDEX IF NOT EXISTS exports_nid ON exports (nid);
+		""")
+		self.refresh()
+
+	def libdocFiles(self):
+		files = []
+		for prxFolder in prxFolders:
+			dirPath = self.directory + '/' + prxFolder + '/'
+			if os.path.isdir(dirPath):
+				files.extend(dirPath + libdocFile for libdocFile in sorted(os.listdir(dirPath)) if libdocFile.endswith('.xml'))
+		return files
+
+	def refresh(self):
+		indexed = dict((path, (mtime, size)) for (path, mtime, size) in self.connection.execute("SELECT path, mtime, size FROM files"))
+		current = {}
+		for path in self.libdocFiles():
+			stat = os.stat(path)
+			current[path] = (stat.st_mtime_ns, stat.st_size)
+
+		with self.connection:
+			for path in indexed:
+				if current.get(path) != indexed[path]:
+					for table in ("files", "exports"):
+						self.connection.execute("DELETE FROM {} WHERE path = ?".format(table), (path,))
+
+			for path in current:
+				if indexed.get(path) == current[path]:
+					continue
+				module = os.path.basename(path).removesuffix('.xml')
+				print("Indexing NID entries from '{}' ...".format(path), file=sys.stderr)
+				exports = set((e.prx, e.libraryName, e.nid, e.name) for e in psp_libdoc.loadPSPLibdoc(path) if e.nidtype == 'fun')
+				self.connection.executemany("INSERT INTO exports VALUES (?, ?, ?, ?, ?, ?)",
+											[(path, module) + export for export in exports])
+				self.connection.execute("INSERT INTO files VALUES (?, ?, ?, 0)", (path, current[path][0], current[path][1]))
+
+			# Query results are given in directory order
+			self.connection.executemany("UPDATE files SET seq = ? WHERE path = ?", [(seq, path) for (seq, path) in enumerate(current)])
+
+	# Return the {prx: sorted [(libraryName, nid, name)]} exports whose column has the given value
+	def query(self, column, value):
+		rows = self.connection.execute("SELECT e.path, prx, library, nid, name FROM exports e JOIN files f ON e.path = f.path WHERE {} = ? ORDER BY f.seq"
+									   .format(column), (value,))
+		files = {}
+		for (path, prx, library, nid, name) in rows:
+			files.setdefault(path, defaultdict(set))[prx].add((library, nid, name))
+
+		nidEntries = {}
+		for path in files:
+			for prx in files[path]:
+				nidEntries[prx] = sorted(files[path][prx], key = lambda x: (x[0], x[1]))
+		return nidEntries
+
+	def nidExports(self, nid):
+		return self.connection.execute("SELECT DISTINCT module, library, name FROM exports e JOIN files f ON e.path = f.path WHERE nid = ? ORDER BY f.seq, library",
+									   (nid.upper().removeprefix('0X'),)).fetchall()
+
+def loadPrxModule(directory, module):
+	return LibdocIndex(directory).query("module", module)
 
 def loadAllPrxModules(directory, library):
-	nidEntries = {}
-	for prxFolder in prxFolders:
-		dirPath = directory + '/' + prxFolder + '/'
-		for libdocFile in os.listdir(dirPath):
-			filePath = os.path.join(dirPath, libdocFile)
-			fileEntries = loadPSPLibdoc(filePath, library)
-
-			if(len(fileEntries) > 0):
-				print("Loading NID entries from '{}' ...".format(filePath))
-				nidEntries.update(fileEntries)
-
-	return nidEntries
+	return LibdocIndex(directory).query("library", library)
 
 def printPrxFunctions(entries):
 	for prx in entries.keys():
@@ -70,7 +106,7 @@ def printPrxFunctions(entries):
 		print()
 
 def printModuleExports(directory, module):
-	exports = loadPrxModule(directory, module, "")
+	exports = loadPrxModule(directory, module)
 
 	if(len(exports) == 0):
 		print("No exports found for module '{}'".format(module))
@@ -87,6 +123,16 @@ def printLibraryExports(directory, library):
 		print("\nModules exporting library '{}':".format(library))
 		printPrxFunctions(exports)
 
+def printNidExports(directory, nid):
+	exports = LibdocIndex(directory).nidExports(nid)
+
+	if(len(exports) == 0):
+		print("No modules found exporting NID '{}'".format(nid))
+	else:
+		print("\nModules exporting NID '{}':".format(nid))
+		for (module, library, name) in exports:
+			print('\t{}: {} --> {}'.format(module, library, name))
+
 if __name__ == '__main__':
 	parser = argparse.ArgumentParser()
 
@@ -100,41 +146,23 @@ if __name__ == '__main__':
 						type=str,
 						help='Print all exports of the specified PRX module')
 
-	parser.add_argument('-i', '--imports',
-						required=False,
-						type=str,
-						help='Print all imports of the specified PRX module')
-
 	parser.add_argument('-l', '--libraryExports',
 						required=False,
 						type=str,
 						help='Print all PRX modules exporting the specified library')
 
-	parser.add_argument('-m', '--libraryImports',
+	parser.add_argument('-n', '--nid',
 						required=False,
 						type=str,
-						help='Print all PRX modules importing the specified library')
+						help='Print all PRX modules and libraries exporting the specified NID')
 
 	args = parser.parse_args(sys.argv[1:])
 
 	if(args.exports):
 		printModuleExports(args.directory, args.exports)
 
-	if(args.imports):
-		printModuleImports(args.directory, args.imports)
-
 	if(args.libraryExports):
 		printLibraryExports(args.directory, args.libraryExports)
 
-	if(args.libraryImports):
-		printLibraryImports(args.directory, args.libraryImports)
-
-
-
-
-
-
-
-
-
-
+	if(args.nid):
+		printNidExports(args.directory, args.nid)
@@ -13,5 +13,7 @@ done
 
 COMBINED_LIBDOC_FILE="PSPLibDoc.xml"
 echo "Saving combined PSP-Libdoc file ${COMBINED_LIBDOC_FILE}"
-./psp_libdoc.py -l ${PRX_FILES[@]} -c "./PSPLibDoc-computed/${COMBINED_LIBDOC_FILE}"
+PACKED_LIBDOC_FILE="PSPLibDoc.pldb.gz"
+echo "Saving packed PSP-Libdoc file ${PACKED_LIBDOC_FILE}"
+./psp_libdoc.py -j 0 -l ${PRX_FILES[@]} -c "./PSPLibDoc-computed/${COMBINED_LIBDOC_FILE}" -w "./PSPLibDoc-computed/${PACKED_LIBDOC_FILE}"
 
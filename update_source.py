@@ -11,6 +11,8 @@ all_nids = defaultdict(set)
 # List of (NID, name, module, library) tuples with non-matching or unknown NID
 all_unk_nids = []
 
+psp_libdoc.enableCache()
+
 # Browse all the export files
 filelist = glob.glob('PSPLibDoc/**/*.xml', recursive=True)
 for (idx, file) in enumerate(filelist):
@@ -20,14 +22,15 @@ for (idx, file) in enumerate(filelist):
     version = file.split('/')[1]
     moduleName = file.split('/')[-1].split('.')[0] + '.prx'
     updated_entries = []
-    for e in entries:
+    name_nids = psp_libdoc.compute_nids([e.name for e in entries])
+    for (e, name_nid) in zip(entries, name_nids):
         # Check if the specified names match their NID
         if e.name.endswith(e.nid): # no name specified, check that there is no source
             if e.source != '':
                 print("source set for", e.name, e.nid, ":", e.source)
                 e = e._replace(source = '')
                 updated_entries.append(e)
-        elif psp_libdoc.compute_nid(e.name) == e.nid: # NIDs matches, specifying 'matching' as the source
+        elif name_nid == e.nid: # NIDs matches, specifying 'matching' as the source
             if e.source != 'matching':
                 e = e._replace(source = 'matching')
                 updated_entries.append(e)